@@ -1,10 +1,9 @@
 #!/bin/bash
 neo4j start
-sleep 100
-neo4j status
 
-# Index nodes on id property
-python -m mira.dkg.indexing --exist-ok
+# Index nodes on id property once the database accepts connections
+python -m mira.dkg.indexing --exist-ok --wait
+neo4j status
 
 # Start the service
 
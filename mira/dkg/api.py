@@ -1,13 +1,17 @@
 """API endpoints."""
 
+import asyncio
 import itertools as itt
-from typing import Any, List, Mapping, Optional, Union
+from typing import Any, Dict, List, Mapping, Optional, Union
 
+import orjson
 import pydantic
-from fastapi import APIRouter, Body, HTTPException, Path, Query, Request
+from fastapi import APIRouter, Body, HTTPException, Path, Query, Request, Response
+from fastapi.responses import ORJSONResponse
 from neo4j.graph import Relationship
 from pydantic import BaseModel, Field
 from scipy.spatial import distance
+from starlette.concurrency import run_in_threadpool
 from typing_extensions import Literal
 
 from mira.dkg.client import AskemEntity, Entity
@@ -17,7 +21,36 @@ __all__ = [
     "api_blueprint",
 ]
 
-api_blueprint = APIRouter()
+api_blueprint = APIRouter(default_response_class=ORJSONResponse)
+
+#: The fields of an entity that are returned by the lexical endpoint
+LEXICAL_FIELDS = {"name", "synonyms", "description", "id"}
+
+#: The fields of an entity that are large and only returned on request
+#: from the list endpoints
+VERBOSE_FIELDS = {"xrefs", "properties"}
+
+
+def _entity_to_dict(entity: Entity, verbose: bool = True) -> Dict[str, Any]:
+    """Get a JSON-ready dictionary for an entity, dropping empty fields.
+
+    This mirrors the ``response_model_exclude_*`` flags on the entity
+    endpoints so that responses can be returned directly without
+    re-validating entities that already came out of the DKG. If
+    ``verbose`` is false, the fields in :data:`VERBOSE_FIELDS` are
+    also dropped.
+    """
+    return entity.dict(
+        exclude=None if verbose else VERBOSE_FIELDS,
+        exclude_unset=True,
+        exclude_defaults=True,
+        exclude_none=True,
+    )
+
+
+#: The maximum number of hops allowed in a relation query. Queries for
+#: paths of unlimited length are capped at this number of hops.
+MAX_RELATION_HOPS = 15
 
 
 class RelationQuery(BaseModel):
@@ -40,12 +73,17 @@ class RelationQuery(BaseModel):
         "right", description="The direction of the relationship"
     )
     relation_min_hops: int = Field(
-        1, description="The minimum number of relationships between the subject and object.", ge=1
+        1,
+        description="The minimum number of relationships between the subject and object.",
+        ge=1,
+        le=MAX_RELATION_HOPS,
     )
     relation_max_hops: int = Field(
         1,
-        description="The maximum number of relationships between the subject and object. Set to 0 to make infinite.",
+        description="The maximum number of relationships between the subject and object. "
+        f"Set to 0 to allow the largest supported number of hops ({MAX_RELATION_HOPS}).",
         ge=0,
+        le=MAX_RELATION_HOPS,
     )
     limit: Optional[int] = Field(
         description="A limit on the number of records returned", example=50, ge=0
@@ -68,7 +106,7 @@ class RelationQuery(BaseModel):
     response_model_exclude_none=True,
     tags=["entities"],
 )
-def get_entity(
+async def get_entity(
     request: Request,
     curie: str = Path(
         ...,
@@ -79,7 +117,8 @@ def get_entity(
     """Get information about an entity (e.g., its name, description synonyms, alternative identifiers,
     database cross-references, etc.) debased on its compact URI (CURIE).
     """
-    return _get_entity(request, curie)
+    entity = await _get_entity(request, curie)
+    return ORJSONResponse(_entity_to_dict(entity))
 
 
 @api_blueprint.get(
@@ -91,7 +130,7 @@ def get_entity(
     response_model_exclude_none=True,
     tags=["entities"],
 )
-def get_entities(
+async def get_entities(
     request: Request,
     curies: str = Path(
         ...,
@@ -99,21 +138,30 @@ def get_entities(
         "entity in the form of ``<prefix>:<local unique identifier>,...``",
         example="ido:0000511,ido:0000512",
     ),
+    verbose: bool = Query(
+        default=True,
+        description="Include database cross-references and properties",
+    ),
 ):
     """
     Get information about multiple entities (e.g., their names, description synonyms,
     alternative identifiers, database cross-references, etc.) based on their
     respective compact URIs (CURIEs).
     """
-    return [
+    entities = await asyncio.gather(*(
         _get_entity(request, curie.strip())
         for curie in curies.split(",")
-    ]
+    ))
+    return ORJSONResponse([
+        _entity_to_dict(entity, verbose=verbose) for entity in entities
+    ])
 
 
-def _get_entity(request: Request, curie: str) -> Union[AskemEntity, Entity]:
+async def _get_entity(request: Request, curie: str) -> Union[AskemEntity, Entity]:
+    # The neo4j driver is blocking, so the query is run in the threadpool
+    # to keep the event loop free for other requests
     try:
-        rv = request.app.state.client.get_entity(curie)
+        rv = await run_in_threadpool(request.app.state.client.get_entity, curie)
     except pydantic.ValidationError:
         raise HTTPException(
             status_code=500,
@@ -131,7 +179,7 @@ def _get_entity(request: Request, curie: str) -> Union[AskemEntity, Entity]:
     "/lexical",
     response_model=List[Entity],
     tags=["entities"],
-    response_model_include={"name", "synonyms", "description", "id"},
+    response_model_include=LEXICAL_FIELDS,
     response_model_exclude_unset=True,
     response_description="A successful response contains a list of Entity objects, subset to only "
     "include the id, name, synonyms, and description fields. Note that below "
@@ -139,7 +187,15 @@ def _get_entity(request: Request, curie: str) -> Union[AskemEntity, Entity]:
 )
 def get_lexical(request: Request):
     """Get lexical information (i.e., name, synonyms, and description) for all entities in the graph."""
-    return request.app.state.lexical_dump
+    # The lexical dump doesn't change while the app is running, so it only
+    # gets serialized once
+    state = request.app.state
+    if getattr(state, "lexical_json", None) is None:
+        state.lexical_json = orjson.dumps([
+            entity.dict(include=LEXICAL_FIELDS, exclude_unset=True)
+            for entity in state.lexical_dump
+        ])
+    return Response(content=state.lexical_json, media_type="application/json")
 
 
 @api_blueprint.get(
@@ -197,7 +253,7 @@ class FullRelationResponse(BaseModel):
     response_model=Union[List[RelationResponse], List[FullRelationResponse]],
     tags=["relations"],
 )
-def get_relations(
+async def get_relations(
     request: Request,
     relation_query: RelationQuery = Body(
         ...,
@@ -300,14 +356,15 @@ def get_relations(
 
     Note that you will rarely use all possible values in this endpoint at the same time.
     """
-    records = request.app.state.client.query_relations(
+    records = await run_in_threadpool(
+        request.app.state.client.query_relations,
         source_type=relation_query.source_type,
         source_curie=relation_query.source_curie,
         relation_name="r",
         relation_type=relation_query.relations,
         relation_direction=relation_query.relation_direction,
         relation_min_hops=relation_query.relation_min_hops,
-        relation_max_hops=relation_query.relation_max_hops,
+        relation_max_hops=relation_query.relation_max_hops or MAX_RELATION_HOPS,
         target_name="t",
         target_type=relation_query.target_type,
         target_curie=relation_query.target_curie,
@@ -316,16 +373,18 @@ def get_relations(
         limit=relation_query.limit,
     )
     if relation_query.full:
-        return [
-            FullRelationResponse(
-                subject=Entity.from_data(s),
-                predicate=dict(p) if isinstance(p, Relationship) else [dict(r) for r in p],
-                object=Entity.from_data(o),
-            )
-            for s, p, o in records
-        ]
+        return ORJSONResponse([
+            {
+                "subject": Entity.from_data_unchecked(s).dict(),
+                "predicate": dict(p) if isinstance(p, Relationship) else [dict(r) for r in p],
+                "object": Entity.from_data_unchecked(o).dict(),
+            }
+            for s, p, o in records or []
+        ])
     else:
-        return [RelationResponse(subject=s, predicate=p, object=o) for s, p, o in records]
+        return ORJSONResponse([
+            {"subject": s, "predicate": p, "object": o} for s, p, o in records or []
+        ])
 
 
 class IsOntChildResult(BaseModel):
@@ -382,7 +441,7 @@ def is_ontological_child(
     response_model_exclude_defaults=True,
     tags=["grounding"],
 )
-def search(
+async def search(
     request: Request,
     q: str = Query(..., example="infect", description="The search query"),
     limit: int = 25,
@@ -419,9 +478,14 @@ def search(
         default=False,
         description="Use Wikidata search if no entities returned from DKG search",
     ),
+    verbose: bool = Query(
+        default=True,
+        description="Include database cross-references and properties",
+    ),
 ):
     """Get nodes based on a search to their name/synonyms."""
-    return request.app.state.client.search(
+    entities = await run_in_threadpool(
+        request.app.state.client.search,
         q,
         limit=limit,
         offset=offset,
@@ -429,6 +493,9 @@ def search(
         labels=labels and labels.split(","),
         wikidata_fallback=wikidata_fallback,
     )
+    return ORJSONResponse([
+        _entity_to_dict(entity, verbose=verbose) for entity in entities
+    ])
 
 
 class ParentQuery(BaseModel):
@@ -3,6 +3,7 @@
 import itertools as itt
 import logging
 import os
+import time
 from collections import Counter, defaultdict
 from difflib import SequenceMatcher
 from functools import lru_cache
@@ -14,6 +15,7 @@ import networkx
 import pystow
 import requests
 from neo4j import GraphDatabase, Transaction, unit_of_work
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
 from pydantic import BaseModel, Field, validator
 from tqdm import tqdm
 from typing_extensions import Literal, TypeAlias
@@ -142,6 +144,44 @@ class Entity(BaseModel):
         -------
         A MIRA entity
         """
+        rv = cls(**cls._unpack_data(data))
+        if rv.prefix == "askemo":
+            return rv.as_askem_entity()
+        return rv
+
+    @classmethod
+    def from_data_unchecked(cls, data):
+        """Create from a data dictionary as it's stored in neo4j, skipping
+        validation.
+
+        This should only be used for data that comes directly out of the
+        DKG, e.g., when building responses for records returned by the
+        neo4j driver.
+
+        Parameters
+        ----------
+        data :
+            Either a plain python dictionary or a :class:`neo4j.graph.Node`
+            object that will get unpacked.
+
+        Returns
+        -------
+        A MIRA entity
+        """
+        rv = cls.construct(**cls._unpack_data(data, unchecked=True))
+        if rv.prefix == "askemo":
+            return rv.as_askem_entity()
+        return rv
+
+    @staticmethod
+    def _unpack_data(data, unchecked: bool = False) -> Dict[str, Any]:
+        """Unpack the parallel lists stored in neo4j into entity fields.
+
+        If ``unchecked`` is set, synonyms and xrefs are built without
+        validation, the same way as in :meth:`from_data_unchecked`.
+        """
+        synonym_cls = Synonym.construct if unchecked else Synonym
+        xref_cls = Xref.construct if unchecked else Xref
         if isinstance(data, neo4j.graph.Node):
             data = dict(data.items())
         properties = defaultdict(list)
@@ -155,22 +195,19 @@ class Entity(BaseModel):
             data.pop("synonyms", []),
             data.pop("synonym_types", []),
         ):
-            synonyms.append(Synonym(value=value, type=type))
+            synonyms.append(synonym_cls(value=value, type=type))
         xrefs = []
         for curie, type in zip(
             data.pop("xrefs", []),
             data.pop("xref_types", []),
         ):
-            xrefs.append(Xref(id=curie, type=type))
-        rv = cls(
+            xrefs.append(xref_cls(id=curie, type=type))
+        return dict(
             **data,
             properties=dict(properties),
             xrefs=xrefs,
             synonyms=synonyms,
         )
-        if rv.prefix == "askemo":
-            return rv.as_askem_entity()
-        return rv
 
     def as_askem_entity(self):
         """Parse this term into an ASKEM Ontology-specific class."""
@@ -252,6 +289,44 @@ class Neo4jClient:
         if self.driver is not None:
             self.driver.close()
 
+    def wait_until_available(
+        self,
+        max_attempts: int = 30,
+        initial_delay: float = 0.5,
+        max_delay: float = 10.0,
+    ) -> None:
+        """Block until the neo4j instance accepts connections.
+
+        Connectivity is checked with an exponential backoff, so a database
+        that comes up quickly isn't waited on for longer than necessary.
+
+        Parameters
+        ----------
+        max_attempts :
+            The number of times to check connectivity before giving up.
+        initial_delay :
+            The number of seconds to wait after the first failed check. The
+            delay grows by half after each subsequent failed check, up to
+            ``max_delay`` seconds.
+        max_delay :
+            The maximum number of seconds to wait between checks.
+
+        Raises
+        ------
+        neo4j.exceptions.ServiceUnavailable
+            If the database isn't available after the last attempt.
+        """
+        for attempt in range(max_attempts):
+            try:
+                self.driver.verify_connectivity()
+            except (ServiceUnavailable, SessionExpired):
+                if attempt == max_attempts - 1:
+                    raise
+                logger.info("Waiting for neo4j to become available")
+                time.sleep(min(initial_delay * 1.5 ** attempt, max_delay))
+            else:
+                return
+
     @lru_cache(maxsize=100)
     def _get_relation_label(self, curie: str) -> str:
         """Get the label for a relation."""
@@ -385,6 +460,14 @@ class Neo4jClient:
         else:
             raise TypeError
 
+        # Every node is labeled with the prefix of its CURIE. Pinning the
+        # label lets the planner use the per-label index on the id property
+        # instead of scanning all nodes
+        if source_curie and not source_type:
+            source_type = _get_curie_label(source_curie)
+        if target_curie and not target_type:
+            target_type = _get_curie_label(target_curie)
+
         match_clause = build_match_clause(
             source_name="s",
             source_type=source_type,
@@ -555,8 +638,13 @@ class Neo4jClient:
         props["labels"] = sorted(neo4j_node.labels)
         return props
 
+    @lru_cache(maxsize=10_000)
     def get_entity(self, curie: str) -> Optional[Entity]:
-        """Look up an entity based on its CURIE."""
+        """Look up an entity based on its CURIE.
+
+        Since the DKG doesn't change while a client is connected to it,
+        entities are cached after being looked up the first time.
+        """
         cypher = f"""\
             MATCH (n {{ id: '{curie}'}})
             RETURN n
@@ -782,6 +870,12 @@ def node_query(
     return rv
 
 
+def _get_curie_label(curie: str) -> str:
+    """Get the neo4j label corresponding to the prefix of a CURIE."""
+    prefix = curie.split(":", 1)[0]
+    return prefix if prefix.isidentifier() else f"`{prefix}`"
+
+
 def _is_cypher_safe(s: str) -> bool:
     return ":" in s
 
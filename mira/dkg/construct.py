@@ -17,18 +17,26 @@ Example command for local bulk import on mac with neo4j 4.x:
         --relationships ~/.data/mira/demo/import/edges.tsv.gz
 
 Then, restart the neo4j service with homebrew ``brew services neo4j restart``
+
+Alternatively, the files can be loaded into a running neo4j instance without
+restarting it using ``python -m mira.dkg.load_neo4j``.
 """
 
 import csv
 import gzip
+import itertools as itt
 import json
 import pickle
 import typing
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from operator import methodcaller
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Dict, NamedTuple, Sequence, Union, Optional
+from typing import (
+    Callable, Dict, Iterable, NamedTuple, Optional, Sequence, Tuple,
+    Union,
+)
 
 import biomappings
 import bioontologies
@@ -62,6 +70,9 @@ METAREGISTRY_PATH = DEMO_MODULE.join(name="metaregistry.json")
 
 OBSOLETE = {"oboinowl:ObsoleteClass", "oboinowl:ObsoleteProperty"}
 
+#: A translation table for removing quotes and newlines from definitions
+_DEFINITION_TRANSLATION = str.maketrans({'"': None, "\n": " "})
+
 
 class DKGConfig(BaseModel):
     use_case: str
@@ -213,12 +224,22 @@ class NodeInfo(NamedTuple):
 @click.option("--do-upload", is_flag=True, help="Upload to S3 on completion")
 @click.option("--refresh", is_flag=True, help="Refresh caches")
 @click.option("--use-case", default="epi", type=click.Choice(list(cases)))
+@click.option(
+    "--max-workers",
+    type=int,
+    default=1,
+    show_default=True,
+    help="The number of processes used for parsing ontologies. Each process "
+    "loads a whole ontology at a time, so memory use grows with the number "
+    "of processes.",
+)
 def main(
     add_xref_edges: bool,
     summaries: bool,
     do_upload: bool,
     refresh: bool,
     use_case: str,
+    max_workers: int,
 ):
     """Generate the node and edge files."""
     if Path(use_case).is_file():
@@ -233,7 +254,8 @@ def main(
         refresh=refresh,
         do_upload=do_upload,
         add_xref_edges=True,
-        summaries=summaries
+        summaries=summaries,
+        max_workers=max_workers,
     )
 
 
@@ -245,6 +267,7 @@ def construct(
     do_upload: bool = False,
     add_xref_edges: bool = False,
     summaries: bool = False,
+    max_workers: int = 1,
 ):
     use_case_paths = UseCasePaths(use_case or config.use_case, config=config)
 
@@ -603,46 +626,37 @@ def construct(
         else:
             return curie_
 
+    def _get_edge_label(curie_: str) -> str:
+        return _get_edge_name(curie_).lower().replace(" ", "_").replace("-", "_")
+
     biomappings_xref_graph = biomappings.get_true_graph()
     added_biomappings = 0
 
-    for prefix in use_case_paths.prefixes:
-        if prefix in {"geonames", "uat", "probonto"}:  # added with custom code
-            continue
-        edges = []
-
-        _results_pickle_path = DEMO_MODULE.join("parsed", name=f"{prefix}.pkl")
-        if _results_pickle_path.is_file() and not refresh:
-            parse_results = pickle.loads(_results_pickle_path.read_bytes())
-        else:
-            if prefix in SLIMS:
-                parse_results = bioontologies.get_obograph_by_path(SLIMS[prefix])
-            elif _pyobo_has(prefix):
-                obo = pyobo.get_ontology(prefix)
-                parse_results = pyobo.parse_results_from_obo(obo)
-            else:
-                parse_results = bioontologies.get_obograph_by_prefix(prefix)
-            if parse_results.graph_document is None:
-                click.secho(
-                    f"{manager.get_name(prefix)} has no graph document",
-                    fg="red",
-                    bold=True,
-                )
-                _results_pickle_path.write_bytes(pickle.dumps(parse_results))
-                continue
+    # Ontologies are independent of each other, so downloading, parsing, and
+    # standardizing them is done in parallel before they get merged below
+    ontology_prefixes = [
+        prefix
+        for prefix in use_case_paths.prefixes
+        if prefix not in {"geonames", "uat", "probonto"}  # added with custom code
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        parse_results_paths = dict(zip(
+            ontology_prefixes,
+            tqdm(
+                executor.map(
+                    partial(_cache_parse_results, refresh=refresh),
+                    ontology_prefixes,
+                ),
+                total=len(ontology_prefixes),
+                unit="prefix",
+                desc="Parsing ontologies",
+            ),
+        ))
 
-            # Standardize graphs before caching
-            parse_results.graph_document.graphs = [
-                graph.standardize(tqdm_kwargs=dict(leave=False))
-                for graph in tqdm(
-                    parse_results.graph_document.graphs,
-                    unit="graph",
-                    desc=f"Standardizing graphs from {prefix}",
-                    leave=False,
-                )
-            ]
-            _results_pickle_path.write_bytes(pickle.dumps(parse_results))
+    for prefix in ontology_prefixes:
+        edges = []
 
+        parse_results = pickle.loads(parse_results_paths[prefix].read_bytes())
         if parse_results.graph_document is None:
             click.secho(f"No graphs in {prefix}, skipping", fg="red")
             continue
@@ -651,25 +665,36 @@ def construct(
         click.secho(
             f"{manager.get_name(prefix)} ({len(_graphs)} graphs)", fg="green", bold=True
         )
-        for graph in tqdm(_graphs, unit="graph", desc=prefix, leave=False):
+        graphs_nodes = [list(_iter_graph_nodes(graph)) for graph in _graphs]
+        # Each graph of an ontology overwrites the node information of its
+        # own terms, so the last graph declaring a term wins. Once a term is
+        # stored, it is only rebuilt in that last graph.
+        last_home_graph_index = {
+            curie: graph_index
+            for graph_index, graph_nodes in enumerate(graphs_nodes)
+            for node, curie in graph_nodes
+            if node.prefix == prefix
+        }
+        for graph_index, (graph, graph_nodes) in enumerate(
+            tqdm(
+                list(zip(_graphs, graphs_nodes)),
+                unit="graph",
+                desc=prefix,
+                leave=False,
+            )
+        ):
             graph_id = graph.id or prefix
             version = graph.version
             if version == "imports":
                 version = None
-            for node in graph.nodes:
-                if node.deprecated or not node.reference:
-                    continue
-                if node.id.startswith("_:gen"):  # skip blank nodes
-                    continue
-                try:
-                    curie = node.curie
-                except ValueError:
-                    tqdm.write(f"error parsing {node.id}")
-                    continue
-                if node.curie.startswith("_:gen"):
-                    continue
+            for node, curie in graph_nodes:
                 node_sources[curie].add(prefix)
-                if curie not in nodes or (curie in nodes and prefix == node.prefix):
+                node_prefix = node.prefix
+                if curie not in nodes or (
+                    prefix == node_prefix
+                    and last_home_graph_index[curie] == graph_index
+                ):
+                    synonyms = node.synonyms
                     # TODO filter out properties that are covered elsewhere
                     properties = sorted(
                         (prop.predicate.curie, prop.value.curie)
@@ -687,12 +712,12 @@ def construct(
                             xref_predicates.append(xref.predicate.curie)
                             xref_references.append(xref.value.curie)
 
-                    if node.curie in biomappings_xref_graph:
-                        for xref_curie in biomappings_xref_graph.neighbors(node.curie):
+                    if curie in biomappings_xref_graph:
+                        for xref_curie in biomappings_xref_graph.neighbors(curie):
                             if ":" not in xref_curie:
                                 continue
                             added_biomappings += 1
-                            xref_predicate = biomappings_xref_graph.edges[node.curie, xref_curie][
+                            xref_predicate = biomappings_xref_graph.edges[curie, xref_curie][
                                 "relation"
                             ]
                             if xref_predicate == "speciesSpecific":
@@ -701,8 +726,8 @@ def construct(
                             xref_references.append(xref_curie)
 
                     nodes[curie] = NodeInfo(
-                        curie=node.curie,
-                        prefix=node.prefix,
+                        curie=curie,
+                        prefix=node_prefix,
                         label=node.name.strip('"')
                         .strip()
                         .strip('"')
@@ -710,14 +735,13 @@ def construct(
                         .replace("  ", " ")
                         if node.name
                         else "",
-                        synonyms=";".join(synonym.value for synonym in node.synonyms),
+                        synonyms=";".join(synonym.value for synonym in synonyms),
                         deprecated="true" if node.deprecated else "false",  # type:ignore
                         # TODO better way to infer type based on hierarchy
                         #  (e.g., if rdfs:type available, consider as instance)
                         type=node.type.lower() if node.type else "unknown",  # type:ignore
                         definition=(node.definition or "")
-                        .replace('"', "")
-                        .replace("\n", " ")
+                        .translate(_DEFINITION_TRANSLATION)
                         .replace("  ", " "),
                         xrefs=";".join(xref_references),
                         alts=";".join(node.alternative_ids),
@@ -727,7 +751,7 @@ def construct(
                         xref_types=";".join(xref_predicates),
                         synonym_types=";".join(
                             synonym.predicate.curie if synonym.predicate else synonym.predicate_raw
-                            for synonym in node.synonyms
+                            for synonym in synonyms
                         ),
                     )
 
@@ -735,7 +759,7 @@ def construct(
                     edges.append(
                         (
                             node.replaced_by,
-                            node.curie,
+                            curie,
                             "replaced_by",
                             "iao:0100001",
                             prefix,
@@ -773,7 +797,7 @@ def construct(
                             continue
                         edges.append(
                             (
-                                node.curie,
+                                curie,
                                 xref.value.curie,
                                 "xref",
                                 "oboinowl:hasDbXref",
@@ -803,7 +827,7 @@ def construct(
 
                 for provenance in node.get_provenance():
                     if ":" in provenance.identifier:
-                        tqdm.write(f"Malformed provenance for {node.curie}: {provenance}")
+                        tqdm.write(f"Malformed provenance for {curie}: {provenance}")
                     provenance_curie = provenance.curie
                     node_sources[provenance_curie].add(prefix)
                     if provenance_curie not in nodes:
@@ -825,7 +849,7 @@ def construct(
                         )
                     edges.append(
                         (
-                            node.curie,
+                            curie,
                             provenance_curie,
                             "has_citation",
                             "debio:0000029",
@@ -873,44 +897,30 @@ def construct(
                 edge.pred for edge in graph.edges if edge.predicate is None
             )
 
-            clean_edges = (
-                edge
-                for edge in graph.edges
-                if (
-                    edge.subject is not None
-                    and edge.predicate is not None
-                    and edge.object is not None
-                    and edge.object.curie not in OBSOLETE
-                )
-            )
-            edges.extend(
-                (
-                    edge.subject.curie,
-                    edge.object.curie,
-                    _get_edge_name(edge.predicate.curie).lower().replace(" ", "_").replace("-", "_"),
-                    edge.predicate.curie,
-                    prefix,
-                    graph_id,
-                    version or "",
-                )
-                for edge in tqdm(
-                    sorted(clean_edges, key=methodcaller("as_tuple")), unit="edge", unit_scale=True
-                )
-            )
-
-        for sub, obj, pred_label, pred, *_ in edges:
-            edge_target_usage_counter[pred, pred_label, obj.split(":")[0]] += 1
-            subject_edge_usage_counter[sub.split(":")[0], pred, pred_label] += 1
-            subject_edge_target_usage_counter[
-                sub.split(":")[0], pred, pred_label, obj.split(":")[0]
-            ] += 1
-            edge_usage_counter[pred, pred_label] += 1
-
+        # The graphs' own edges, which make up the bulk of the edges, are
+        # streamed straight into the file instead of being collected in a
+        # list first. The bulk import doesn't need edges to be sorted.
+        # There are far fewer predicates than edges, so each predicate's label
+        # is only looked up and normalized once per ontology
+        get_edge_label = lru_cache(maxsize=None)(_get_edge_label)
+        edge_rows = itt.chain(
+            edges, _iter_graph_edges(_graphs, prefix, get_edge_label)
+        )
         edges_path = use_case_paths.EDGES_PATHS[prefix]
         with edges_path.open("w") as file:
             writer = csv.writer(file, delimiter="\t", quoting=csv.QUOTE_MINIMAL)
             writer.writerow(EDGE_HEADER)
-            writer.writerows(edges)
+            for row in edge_rows:
+                sub, obj, pred_label, pred, *_ = row
+                sub_prefix = sub.split(":", 1)[0]
+                obj_prefix = obj.split(":", 1)[0]
+                edge_target_usage_counter[pred, pred_label, obj_prefix] += 1
+                subject_edge_usage_counter[sub_prefix, pred, pred_label] += 1
+                subject_edge_target_usage_counter[
+                    sub_prefix, pred, pred_label, obj_prefix
+                ] += 1
+                edge_usage_counter[pred, pred_label] += 1
+                writer.writerow(row)
         tqdm.write(f"output edges to {edges_path}")
 
     tqdm.write(f"incorporated {added_biomappings:,} xrefs from biomappings")
@@ -918,10 +928,12 @@ def construct(
     with gzip.open(use_case_paths.NODES_PATH, "wt") as file:
         writer = csv.writer(file, delimiter="\t", quoting=csv.QUOTE_MINIMAL)
         writer.writerow(NODE_HEADER)
+        # Only the keys get sorted so that a second list holding all the
+        # node tuples doesn't have to be built before writing
         writer.writerows(
             (
-                (*node, ";".join(sorted(node_sources[curie])))
-                for curie, node in tqdm(sorted(nodes.items()), unit="node", unit_scale=True)
+                (*nodes[curie], ";".join(sorted(node_sources[curie])))
+                for curie in tqdm(sorted(nodes), unit="node", unit_scale=True)
             )
         )
     tqdm.write(f"output edges to {use_case_paths.NODES_PATH}")
@@ -1001,11 +1013,16 @@ def _write_counter(
                 print(*title, "count", sep="\t", file=file)
             else:
                 print(title, "count", sep="\t", file=file)
-        for key, count in counter.most_common():
-            if unpack:
-                print(*key, count, sep="\t", file=file)
-            else:
-                print(key, count, sep="\t", file=file)
+        # Write all rows in one call rather than one print call per row
+        if unpack:
+            file.writelines(
+                "\t".join(map(str, (*key, count))) + "\n"
+                for key, count in counter.most_common()
+            )
+        else:
+            file.writelines(
+                f"{key}\t{count}\n" for key, count in counter.most_common()
+            )
 
 
 def upload_s3(
@@ -1077,6 +1094,128 @@ def get_node_info(term: pyobo.Term, type: EntityType = "class"):
     )
 
 
+def _cache_parse_results(prefix: str, refresh: bool = False) -> Path:
+    """Parse and standardize the ontology for a prefix and cache it.
+
+    Parameters
+    ----------
+    prefix :
+        The prefix of the ontology to parse.
+    refresh :
+        If true, parse the ontology even if cached results are available.
+
+    Returns
+    -------
+    :
+        The path to the pickle containing the parse results.
+    """
+    results_pickle_path = DEMO_MODULE.join("parsed", name=f"{prefix}.pkl")
+    if results_pickle_path.is_file() and not refresh:
+        return results_pickle_path
+
+    if prefix in SLIMS:
+        parse_results = bioontologies.get_obograph_by_path(SLIMS[prefix])
+    elif _pyobo_has(prefix):
+        obo = pyobo.get_ontology(prefix)
+        parse_results = pyobo.parse_results_from_obo(obo)
+    else:
+        parse_results = bioontologies.get_obograph_by_prefix(prefix)
+    if parse_results.graph_document is None:
+        click.secho(
+            f"{manager.get_name(prefix)} has no graph document",
+            fg="red",
+            bold=True,
+        )
+    else:
+        # Standardize graphs before caching
+        parse_results.graph_document.graphs = [
+            graph.standardize(tqdm_kwargs=dict(leave=False))
+            for graph in tqdm(
+                parse_results.graph_document.graphs,
+                unit="graph",
+                desc=f"Standardizing graphs from {prefix}",
+                leave=False,
+            )
+        ]
+    results_pickle_path.write_bytes(pickle.dumps(parse_results))
+    return results_pickle_path
+
+
+def _iter_graph_edges(
+    graphs, prefix: str, get_edge_label: Callable[[str], str]
+) -> Iterable[Tuple[str, ...]]:
+    """Iterate over rows for the edges file from standardized graphs.
+
+    Parameters
+    ----------
+    graphs :
+        The standardized graphs from an ontology's graph document.
+    prefix :
+        The prefix of the ontology the graphs came from.
+    get_edge_label :
+        A function that gets the label used as the relationship type in
+        neo4j for a predicate CURIE.
+
+    Returns
+    -------
+    :
+        Rows of the edges file, in the order of :data:`EDGE_HEADER`.
+    """
+    for graph in graphs:
+        graph_id = graph.id or prefix
+        version = graph.version
+        if version == "imports":
+            version = None
+        for edge in tqdm(graph.edges, unit="edge", unit_scale=True, leave=False):
+            if (
+                edge.subject is None
+                or edge.predicate is None
+                or edge.object is None
+                or edge.object.curie in OBSOLETE
+            ):
+                continue
+            yield (
+                edge.subject.curie,
+                edge.object.curie,
+                get_edge_label(edge.predicate.curie),
+                edge.predicate.curie,
+                prefix,
+                graph_id,
+                version or "",
+            )
+
+
+def _iter_graph_nodes(graph) -> Iterable[Tuple[obograph.Node, str]]:
+    """Iterate over the nodes of a standardized graph that become DKG nodes.
+
+    Deprecated nodes, blank nodes, and nodes whose CURIE can't be parsed are
+    skipped.
+
+    Parameters
+    ----------
+    graph :
+        A standardized graph from an ontology's graph document.
+
+    Returns
+    -------
+    :
+        Pairs of each node and its CURIE.
+    """
+    for node in graph.nodes:
+        if node.deprecated or not node.reference:
+            continue
+        if node.id.startswith("_:gen"):  # skip blank nodes
+            continue
+        try:
+            curie = node.curie
+        except ValueError:
+            tqdm.write(f"error parsing {node.id}")
+            continue
+        if curie.startswith("_:gen"):
+            continue
+        yield node, curie
+
+
 def _pyobo_has(prefix: str) -> bool:
     try:
         ontology_resolver.lookup(prefix)
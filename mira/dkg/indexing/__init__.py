@@ -1,11 +1,16 @@
 import time
+from typing import Iterable, Optional
 
 from tqdm import tqdm
 
 from mira.dkg.client import Neo4jClient
 
 
-def index_nodes_on_id(client: Neo4jClient, exist_ok: bool = False):
+def index_nodes_on_id(
+    client: Neo4jClient,
+    exist_ok: bool = False,
+    labels: Optional[Iterable[str]] = None,
+):
     """Index all nodes on the id property
 
     Parameters
@@ -14,13 +19,22 @@ def index_nodes_on_id(client: Neo4jClient, exist_ok: bool = False):
         Neo4jClient instance to the graph database to be indexed
     exist_ok :
         If False, raise an exception if the index already exists. Default: False.
+    labels :
+        The labels of the nodes to index. If not given, all labels in the
+        graph database are indexed. Giving them makes it possible to build
+        the indexes before the nodes are loaded.
     """
     # A label has to be provided to build the index, so we have to loop over
     # all labels and build the index for each one.
-    labels = [
-        ll[0]
-        for ll in client.query_tx("CALL db.labels() YIELD label RETURN label")
-    ]
+    if labels is None:
+        labels = [
+            ll[0]
+            for ll in client.query_tx(
+                "CALL db.labels() YIELD label RETURN label"
+            )
+        ]
+    else:
+        labels = sorted(labels)
     print(f"Indexing nodes on id property for the following labels: {labels}")
     for label in tqdm(labels, desc="Indexing nodes on id", unit="label"):
         client.create_single_property_node_index(
@@ -11,11 +11,19 @@ import click
     help="If set, skip already set indices silently, otherwise an exception "
          "is raised if attempting to set an index that already exists.",
 )
-def main(exist_ok: bool = False):
+@click.option(
+    "--wait",
+    is_flag=True,
+    help="If set, wait for the database to accept connections before "
+         "indexing, e.g., right after starting neo4j.",
+)
+def main(exist_ok: bool = False, wait: bool = False):
     """Build indexes on the database."""
     from . import index_nodes_on_id
     from mira.dkg.client import Neo4jClient
 
     client = Neo4jClient()
+    if wait:
+        client.wait_until_available()
     click.secho("Indexing all nodes on the id property.", fg="green")
     index_nodes_on_id(client, exist_ok=exist_ok)
@@ -0,0 +1,243 @@
+"""Load the DKG nodes and edges files into a running neo4j instance.
+
+Unlike the bulk import with ``neo4j-admin import`` described in
+:mod:`mira.dkg.construct`, this doesn't require the database to be stopped
+and restarted, which makes it useful for quickly iterating on a DKG build.
+Run with ``python -m mira.dkg.load_neo4j``.
+"""
+
+import csv
+import gzip
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+
+import click
+from tqdm import tqdm
+
+from mira.dkg.client import Neo4jClient
+from mira.dkg.construct import UseCasePaths, cases
+from mira.dkg.indexing import index_nodes_on_id
+
+__all__ = [
+    "get_node_labels",
+    "load_nodes",
+    "load_edges",
+]
+
+#: The number of rows sent to neo4j in each transaction
+BATCH_SIZE = 50_000
+
+
+def _escape(name: str) -> str:
+    """Escape a label or relationship type for use in a Cypher query."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def _get_row_parser(header: Sequence[str]):
+    """Get a function that turns a row into a dictionary of properties.
+
+    The columns are interpreted the same way as by ``neo4j-admin import``,
+    i.e., ``name:string[]`` columns are split on semicolons and
+    ``name:boolean`` columns are parsed. Empty values are left out.
+    """
+    columns = []
+    for column in header:
+        name, _, dtype = column.partition(":")
+        columns.append((name, dtype))
+
+    def _parse_row(row: Sequence[str]) -> Dict[str, Any]:
+        rv = {}
+        for (name, dtype), value in zip(columns, row):
+            if not name or not value:
+                continue
+            if dtype == "string[]":
+                rv[name] = value.split(";")
+            elif dtype == "boolean":
+                rv[name] = value == "true"
+            else:
+                rv[name] = value
+        return rv
+
+    return _parse_row
+
+
+def _get_label(curie: str) -> str:
+    return curie.split(":", 1)[0]
+
+
+def _load_batches(
+    client: Neo4jClient,
+    rows: Iterable[Tuple[str, Dict[str, Any]]],
+    batch_size: int,
+) -> int:
+    """Send rows to neo4j in batches, grouped by the query they need.
+
+    Labels and relationship types can't be passed as query parameters, so
+    rows are grouped by their query and each group is sent using ``UNWIND``
+    once it fills up a batch.
+    """
+    batches: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    count = 0
+    for query, row in rows:
+        batch = batches[query]
+        batch.append(row)
+        if len(batch) >= batch_size:
+            client.create_tx(query, rows=batch)
+            batches[query] = []
+        count += 1
+    for query, batch in batches.items():
+        if batch:
+            client.create_tx(query, rows=batch)
+    return count
+
+
+def get_node_labels(path: Path) -> Set[str]:
+    """Get the labels of the nodes in a nodes file.
+
+    Parameters
+    ----------
+    path :
+        The path to the gzipped nodes TSV file.
+
+    Returns
+    -------
+    :
+        The labels used by any of the nodes.
+    """
+    labels = set()
+    with gzip.open(path, "rt") as file:
+        reader = csv.reader(file, delimiter="\t")
+        label_index = next(reader).index(":LABEL")
+        for row in reader:
+            labels.update(row[label_index].split(";"))
+    return labels
+
+
+def load_nodes(
+    client: Neo4jClient, path: Path, batch_size: int = BATCH_SIZE
+) -> int:
+    """Load nodes from a nodes file made by :mod:`mira.dkg.construct`.
+
+    The nodes' labels should be indexed on the id property before this is
+    run, e.g., with :func:`mira.dkg.indexing.index_nodes_on_id` and the
+    labels from :func:`get_node_labels`. Otherwise, each node's ``MERGE``
+    scans all the nodes already loaded with its labels.
+
+    Parameters
+    ----------
+    client :
+        The client for the neo4j instance to load the nodes into.
+    path :
+        The path to the gzipped nodes TSV file.
+    batch_size :
+        The number of nodes to create in each transaction.
+
+    Returns
+    -------
+    :
+        The number of nodes that were loaded.
+    """
+
+    def _iter_rows():
+        with gzip.open(path, "rt") as file:
+            reader = csv.reader(file, delimiter="\t")
+            header = next(reader)
+            label_index = header.index(":LABEL")
+            parse_row = _get_row_parser(header)
+            rows = tqdm(
+                reader, unit="node", unit_scale=True, desc="Loading nodes"
+            )
+            for row in rows:
+                labels = ":".join(
+                    _escape(label) for label in row[label_index].split(";")
+                )
+                query = (
+                    f"UNWIND $rows AS row "
+                    f"MERGE (n:{labels} {{id: row.id}}) SET n += row"
+                )
+                yield query, parse_row(row)
+
+    return _load_batches(client, _iter_rows(), batch_size=batch_size)
+
+
+def load_edges(
+    client: Neo4jClient, path: Path, batch_size: int = BATCH_SIZE
+) -> int:
+    """Load edges from an edges file made by :mod:`mira.dkg.construct`.
+
+    Nodes should be loaded and indexed before this is run, since edges are
+    created between nodes looked up by their identifiers. As with the bulk
+    import, edges whose nodes can't be found are skipped.
+
+    Parameters
+    ----------
+    client :
+        The client for the neo4j instance to load the edges into.
+    path :
+        The path to the gzipped edges TSV file.
+    batch_size :
+        The number of edges to create in each transaction.
+
+    Returns
+    -------
+    :
+        The number of edges that were processed.
+    """
+
+    def _iter_rows():
+        with gzip.open(path, "rt") as file:
+            reader = csv.reader(file, delimiter="\t")
+            header = next(reader)
+            start_index = header.index(":START_ID")
+            end_index = header.index(":END_ID")
+            type_index = header.index(":TYPE")
+            parse_row = _get_row_parser(header)
+            rows = tqdm(
+                reader, unit="edge", unit_scale=True, desc="Loading edges"
+            )
+            for row in rows:
+                start, end = row[start_index], row[end_index]
+                # Each node is labeled with its prefix, so pinning the labels
+                # lets neo4j use the index on the id property
+                query = (
+                    f"UNWIND $rows AS row "
+                    f"MATCH (s:{_escape(_get_label(start))} {{id: row.start}}) "
+                    f"MATCH (t:{_escape(_get_label(end))} {{id: row.end}}) "
+                    f"CREATE (s)-[r:{_escape(row[type_index])}]->(t) "
+                    f"SET r = row.properties"
+                )
+                yield query, {
+                    "start": start,
+                    "end": end,
+                    "properties": parse_row(row),
+                }
+
+    return _load_batches(client, _iter_rows(), batch_size=batch_size)
+
+
+@click.command()
+@click.option("--use-case", default="epi", type=click.Choice(list(cases)))
+@click.option(
+    "--batch-size",
+    default=BATCH_SIZE,
+    show_default=True,
+    help="The number of rows to load in each transaction",
+)
+def main(use_case: str, batch_size: int):
+    """Load the DKG into a running neo4j instance."""
+    use_case_paths = UseCasePaths(use_case)
+    client = Neo4jClient()
+    # Index the labels before loading the nodes so that merging each node
+    # looks up its id in the index instead of scanning its label
+    index_nodes_on_id(
+        client,
+        exist_ok=True,
+        labels=get_node_labels(use_case_paths.NODES_PATH),
+    )
+    load_nodes(client, use_case_paths.NODES_PATH, batch_size=batch_size)
+    load_edges(client, use_case_paths.EDGES_PATH, batch_size=batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,15 @@
 """Get terms from the eiffel climate ontology"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Tuple
+
 import curies
 import pystow
+import rdflib
 from curies import Converter
 from pyobo import Term, Reference, TypeDef
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.sparql import Query
 import bioregistry
 
 __all__ = ["get_eiffel_ontology_terms"]
@@ -24,6 +31,7 @@ SDG_GOAL_URL = (
     "https://raw.githubusercontent.com/benmomo/eiffel-ontology/"
     "main/ontology/sdg-kos-goals-targets-indicators.ttl"
 )
+URLS = [ECV_KB_URL, EO_KB_URL, SDG_GOAL_URL, SDG_SERIES_URL]
 
 ECV_INFO_QUERY = """
 SELECT DISTINCT ?individual ?description ?label
@@ -105,6 +113,24 @@ WHERE{
 """
 
 
+@lru_cache(maxsize=None)
+def _prepare_query(query: str, namespaces: Tuple[Tuple[str, str], ...]) -> Query:
+    return prepareQuery(query, initNs=dict(namespaces))
+
+
+def query_graph(graph: rdflib.Graph, query: str):
+    """Run a SPARQL query on a graph, reusing previously compiled queries.
+
+    Like :meth:`rdflib.Graph.query`, the prefixes in the query are resolved
+    using the namespaces bound in the graph, so queries are compiled once
+    for each distinct set of namespaces they are used with.
+    """
+    namespaces = tuple(
+        sorted((prefix, str(uri)) for prefix, uri in graph.namespaces())
+    )
+    return graph.query(_prepare_query(query, namespaces))
+
+
 def replace_newline_whitespace(text: str) -> str:
     text = text.replace("\n", " ")
     text = text.replace("  ", " ")
@@ -112,6 +138,8 @@ def replace_newline_whitespace(text: str) -> str:
 
 
 def process_ecv(converter: curies.Converter):
+    # The same URIs show up in many rows of the query results
+    compress = lru_cache(maxsize=None)(converter.compress)
     prefix = "ecv"
     has_ecv_product_requirement = TypeDef(
         reference=Reference(
@@ -167,7 +195,7 @@ def process_ecv(converter: curies.Converter):
         url=ECV_KB_URL, parse_kwargs=dict(format="turtle")
     )
     curie_to_term = {}
-    for res in graph.query(ECV_INFO_QUERY):
+    for res in query_graph(graph, ECV_INFO_QUERY):
         label = res["label"]
         description = res["description"]
         if label is not None:
@@ -175,16 +203,16 @@ def process_ecv(converter: curies.Converter):
         if description is not None:
             description = replace_newline_whitespace(description)
 
-        curie = converter.compress(res["individual"], strict=True)
+        curie = compress(res["individual"], strict=True)
         curie_to_term[curie] = Term(
             reference=Reference.from_curie(curie, label, strict=True),
             definition=description,
         )
 
-    for res in graph.query(ECV_RELATION_QUERY):
-        subject_curie = converter.compress(res["subject"])
-        predicate_curie = converter.compress(res["predicate"])
-        object_curie = converter.compress(res["object"])
+    for res in query_graph(graph, ECV_RELATION_QUERY):
+        subject_curie = compress(res["subject"])
+        predicate_curie = compress(res["predicate"])
+        object_curie = compress(res["object"])
 
         curie_to_term[subject_curie].append_relationship(
             curie_to_typedef[predicate_curie],
@@ -195,10 +223,12 @@ def process_ecv(converter: curies.Converter):
 
 
 def process_eo(converter: curies.Converter):
+    # The same URIs show up in many rows of the query results
+    compress = lru_cache(maxsize=None)(converter.compress)
     prefix = "eotaxonomy"
     graph = MODULE.ensure_rdf(url=EO_KB_URL, parse_kwargs=dict(format="turtle"))
     curie_to_term = {}
-    for res in graph.query(EO_INFO_QUERY):
+    for res in query_graph(graph, EO_INFO_QUERY):
         label = res["label"]
         description = res["description"]
         if label is not None:
@@ -206,7 +236,7 @@ def process_eo(converter: curies.Converter):
         if description is not None:
             description = replace_newline_whitespace(description)
 
-        curie = converter.compress(res["individual"], strict=True)
+        curie = compress(res["individual"], strict=True)
         curie_to_term[curie] = Term(
             reference=Reference.from_curie(curie, label, strict=True),
             definition=description,
@@ -258,10 +288,10 @@ def process_eo(converter: curies.Converter):
         prefix + ":hasDomain": has_domain,
         prefix + ":hasAlignedCopernicusService": has_aligned_copernicus_service,
     }
-    for res in graph.query(EO_RELATION_QUERY):
-        subject_curie = converter.compress(res["subject"])
-        predicate_curie = converter.compress(res["predicate"])
-        object_curie = converter.compress(res["object"])
+    for res in query_graph(graph, EO_RELATION_QUERY):
+        subject_curie = compress(res["subject"])
+        predicate_curie = compress(res["predicate"])
+        object_curie = compress(res["object"])
 
         curie_to_term[subject_curie].append_relationship(
             curie_to_typedef[predicate_curie],
@@ -272,17 +302,19 @@ def process_eo(converter: curies.Converter):
 
 
 def process_sdg_goals(converter: curies.Converter):
+    # The same URIs show up in many rows of the query results
+    compress = lru_cache(maxsize=None)(converter.compress)
     graph = MODULE.ensure_rdf(
         url=SDG_GOAL_URL, parse_kwargs=dict(format="turtle")
     )
     curie_to_term = {}
 
-    for res in graph.query(SDG_INFO_QUERY):
+    for res in query_graph(graph, SDG_INFO_QUERY):
         label = res["label"]
         if label is not None:
             label = replace_newline_whitespace(label)
 
-        curie = converter.compress(res["individual"], strict=True)
+        curie = compress(res["individual"], strict=True)
         # Do not pass in a description to the definition argument for the
         # Term constructor when processing SDG files as descriptions are not
         # present
@@ -326,10 +358,10 @@ def process_sdg_goals(converter: curies.Converter):
         "skos:broader": broader,
         "skos:narrower": narrower,
     }
-    for res in graph.query(SDG_GOALS_RELATION_QUERY):
-        subject_curie = converter.compress(res["subject"])
-        predicate_curie = converter.compress(res["predicate"])
-        object_curie = converter.compress(res["object"])
+    for res in query_graph(graph, SDG_GOALS_RELATION_QUERY):
+        subject_curie = compress(res["subject"])
+        predicate_curie = compress(res["predicate"])
+        object_curie = compress(res["object"])
 
         curie_to_term[subject_curie].append_relationship(
             curie_to_typedef[predicate_curie],
@@ -339,16 +371,18 @@ def process_sdg_goals(converter: curies.Converter):
 
 
 def process_sdg_series(converter: curies.Converter):
+    # The same URIs show up in many rows of the query results
+    compress = lru_cache(maxsize=None)(converter.compress)
     graph = MODULE.ensure_rdf(
         url=SDG_SERIES_URL, parse_kwargs=dict(format="turtle")
     )
     curie_to_term = {}
-    for res in graph.query(SDG_INFO_QUERY):
+    for res in query_graph(graph, SDG_INFO_QUERY):
         label = res["label"]
         if label is not None:
             label = replace_newline_whitespace(label)
 
-        curie = converter.compress(res["individual"], strict=True)
+        curie = compress(res["individual"], strict=True)
         curie_to_term[curie] = Term(
             reference=Reference.from_curie(curie, label, strict=True)
         )
@@ -365,10 +399,10 @@ def process_sdg_series(converter: curies.Converter):
         "skos:broader": broader,
         "sdgo:isSeriesOf": is_series_of,
     }
-    for res in graph.query(SDG_SERIES_RELATION_QUERY):
-        subject_curie = converter.compress(res["subject"])
-        predicate_curie = converter.compress(res["predicate"])
-        object_curie = converter.compress(res["object"])
+    for res in query_graph(graph, SDG_SERIES_RELATION_QUERY):
+        subject_curie = compress(res["subject"])
+        predicate_curie = compress(res["predicate"])
+        object_curie = compress(res["object"])
 
         curie_to_term[subject_curie].append_relationship(
             curie_to_typedef[predicate_curie],
@@ -378,6 +412,17 @@ def process_sdg_series(converter: curies.Converter):
     return curie_to_term
 
 
+def ensure_eiffel_files() -> None:
+    """Download any of the EIFFEL ontology files that aren't cached yet.
+
+    The files are downloaded concurrently. Since :func:`pystow.ensure_rdf`
+    looks in the same location, the ``process_*`` functions then only
+    need to parse the cached files.
+    """
+    with ThreadPoolExecutor(max_workers=len(URLS)) as executor:
+        list(executor.map(lambda url: MODULE.ensure(url=url), URLS))
+
+
 def get_eiffel_ontology_terms() -> list[Term]:
     converter = Converter.from_prefix_map(
         {
@@ -428,6 +473,8 @@ def get_eiffel_ontology_terms() -> list[Term]:
         "goals and development targets by the United Nations",
     )
 
+    ensure_eiffel_files()
+
     rv = []
 
     rv.extend(process_ecv(converter).values())
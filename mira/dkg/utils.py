@@ -2,7 +2,7 @@
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import numpy as np
 from gilda.grounder import Grounder
@@ -27,6 +27,9 @@ class MiraState:
     refinement_closure: RefinementClosure
     lexical_dump: List[Entity]
     vectors: Dict[str, np.array]
+    #: The serialized response for the lexical endpoint, which gets
+    #: populated on its first request
+    lexical_json: Optional[bytes] = None
 
 
 #: A list of all prefixes used in MIRA
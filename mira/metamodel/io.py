@@ -3,6 +3,8 @@ __all__ = ["model_from_json_file", "model_to_json_file",
            "expression_to_mathml", "mathml_to_expression"]
 
 import json
+from functools import lru_cache
+
 import sympy
 from .template_model import TemplateModel, SympyExprStr
 
@@ -60,18 +62,37 @@ def expression_to_mathml(expression: sympy.Expr, *args, **kwargs) -> str:
     """
     if isinstance(expression, SympyExprStr):
         expression = expression.args[0]
+    # The same expressions (e.g., mass-action rate laws) come up over and
+    # over again when exporting models so the default printing is cached
+    if not args and not kwargs and isinstance(expression, sympy.Basic):
+        return _expression_to_mathml_cached(sympy.srepr(expression),
+                                            expression)
+    return _expression_to_mathml(expression, *args, **kwargs)
+
 
+def _expression_to_mathml(expression: sympy.Expr, *args, **kwargs) -> str:
     mappings = {}
+    replacements = {}
     for sym in expression.atoms(sympy.Symbol):
         name = '|' + str(sym).replace('_', 'QQQ') + '|'
         mappings[str(sym)] = name
-        expression = expression.subs(sym, sympy.Symbol(name))
+        replacements[sym] = sympy.Symbol(name)
+    # Replacing all symbols at once takes a single pass over the expression
+    expression = expression.xreplace(replacements)
     mml = sympy.mathml(expression, *args, **kwargs)
     for old_symbol, new_symbol in mappings.items():
         mml = mml.replace(new_symbol, old_symbol)
     return mml
 
 
+@lru_cache(maxsize=4096)
+def _expression_to_mathml_cached(key: str, expression: sympy.Expr) -> str:
+    # The key is the expression's srepr since depending on the version of
+    # sympy, expressions that print differently (e.g., 2*x and 2.0*x) can
+    # compare and hash as equal
+    return _expression_to_mathml(expression)
+
+
 def mathml_to_expression(xml_str: str) -> sympy.Expr:
     """Convert a MathML string to a sympy expression.
 
@@ -5,15 +5,17 @@ __all__ = [
     'per_day_units',
     'dimensionless_units',
     'per_day_per_person_units',
-    'UNIT_SYMBOLS'
+    'UNIT_SYMBOLS',
+    'parse_unit_expression',
 ]
 
 import os
+from functools import lru_cache
 from typing import Dict, Any
 
 import sympy
 from pydantic import BaseModel, Field
-from .utils import SympyExprStr
+from .utils import SympyExprStr, safe_parse_expr
 
 
 def load_units():
@@ -21,7 +23,7 @@ def load_units():
                         os.pardir, 'dkg', 'resources', 'unit_names.tsv')
     with open(path, 'r') as fh:
         units = {}
-        for line in fh.readlines():
+        for line in fh.read().splitlines():
             symbol = line.strip()
             units[symbol] = sympy.Symbol(symbol)
     return units
@@ -30,6 +32,16 @@ def load_units():
 UNIT_SYMBOLS = load_units()
 
 
+@lru_cache(maxsize=4096)
+def parse_unit_expression(expression: str) -> sympy.Expr:
+    """Parse a unit expression string using the known unit symbols.
+
+    Models typically reuse a handful of units many times, so parsed
+    expressions are cached by their string form.
+    """
+    return safe_parse_expr(expression, local_dict=UNIT_SYMBOLS)
+
+
 class Unit(BaseModel):
     """A unit of measurement."""
     class Config:
@@ -38,7 +50,7 @@ class Unit(BaseModel):
             SympyExprStr: lambda e: str(e),
         }
         json_decoders = {
-            SympyExprStr: lambda e: sympy.parse_expr(e)
+            SympyExprStr: parse_unit_expression
         }
 
     expression: SympyExprStr = Field(
@@ -47,17 +59,43 @@ class Unit(BaseModel):
 
     @classmethod
     def from_json(cls, data: Dict[str, Any]) -> "Unit":
-        # Use get_sympy from amr.petrinet, but avoid circular import
-        from mira.sources.amr.petrinet import get_sympy
-        data["expression"] = get_sympy(data, local_dict=UNIT_SYMBOLS)
+        if data.get("expression"):
+            data["expression"] = parse_unit_expression(data["expression"])
+        else:
+            # Use get_sympy from amr.petrinet, but avoid circular import
+            from mira.sources.amr.petrinet import get_sympy
+            data["expression"] = get_sympy(data, local_dict=UNIT_SYMBOLS)
         assert data.get('expression') is None or not isinstance(
             data['expression'], str
         )
-        return cls(**data)
+        if data["expression"] is None:
+            return cls(**data)
+        return cls.from_expression_unchecked(data["expression"])
+
+    @classmethod
+    def from_expression_unchecked(cls, expression: sympy.Expr) -> "Unit":
+        """Create a unit from a sympy expression, skipping validation.
+
+        Parameters
+        ----------
+        expression :
+            A sympy expression for the unit.
+
+        Returns
+        -------
+        :
+            The unit with the given expression.
+        """
+        if not isinstance(expression, SympyExprStr):
+            expression = SympyExprStr(expression)
+        return cls.construct(expression=expression)
+
 
+_person = sympy.Symbol('person')
+_day = sympy.Symbol('day')
 
-person_units = Unit(expression=sympy.Symbol('person'))
-day_units = Unit(expression=sympy.Symbol('day'))
-per_day_units = Unit(expression=1/sympy.Symbol('day'))
-dimensionless_units = Unit(expression=sympy.Integer('1'))
-per_day_per_person_units = Unit(expression=1/(sympy.Symbol('day')*sympy.Symbol('person')))
+person_units = Unit.from_expression_unchecked(_person)
+day_units = Unit.from_expression_unchecked(_day)
+per_day_units = Unit.from_expression_unchecked(1/_day)
+dimensionless_units = Unit.from_expression_unchecked(sympy.Integer('1'))
+per_day_per_person_units = Unit.from_expression_unchecked(1/(_day*_person))
@@ -82,12 +82,17 @@ class PetriNetModel:
         self.observables = []
         self.vmap = {variable.key: (idx + 1) for idx, variable
                      in enumerate(model.variables.values())}
+        vmap = self.vmap
+        # This is the same for all states so it's only built once
+        parameters_dict = {param_name: param_object.value for param_name, param_object in
+                           model.parameters.items() if not param_object.placeholder}
         for key, var in model.variables.items():
             # Use the variable's concept name if possible but fall back
             # on the key otherwise
-            name = var.data.get('name') or str(key)
-            ids = str(var.data.get('identifiers', '')) or None
-            context = str(var.data.get('context', '')) or None
+            data = var.data
+            name = data.get('name') or str(key)
+            ids = str(data.get('identifiers', '')) or None
+            context = str(data.get('context', '')) or None
             state_data = {
                 'sname': name,
                 'sprop': {
@@ -97,21 +102,19 @@ class PetriNetModel:
                     'mira_concept': var.concept.json(),
                 }
             }
-            initial_expr = var.data.get('expression')
+            initial_expr = data.get('expression')
             if initial_expr is not None:
-                parameters_dict = {param_name: param_object.value for param_name, param_object in
-                                   model.parameters.items() if not param_object.placeholder}
-
                 state_data['concentration'] = float(initial_expr.subs(parameters_dict).args[0])
             else:
                 state_data['concentration'] = 0.0
             self.states.append(state_data)
 
         for idx, transition in enumerate(model.transitions.values()):
+            tnum = idx + 1
             # NOTE: this is a bit hacky. It attempts to determine
             # if the parameter was generated automatically
             if not isinstance(transition.rate.key, str):
-                pname = f"p_petri_{idx + 1}"
+                pname = f"p_petri_{tnum}"
             else:
                 pname = transition.rate.key
 
@@ -119,7 +122,7 @@ class PetriNetModel:
                 if transition.rate.distribution else None
             pvalue = transition.rate.value
             transition_dict = {
-                'tname': f"t{idx + 1}",
+                'tname': f"t{tnum}",
                 'tprop': {
                     'template_type': transition.template_type,
                     'parameter_name': pname,
@@ -147,7 +150,7 @@ class PetriNetModel:
                     p = model.parameters.get(parameter_name)
                     if p is None:
                         continue
-                    key = p.key if p.key else f"p_petri_{idx + 1}"
+                    key = p.key if p.key else f"p_petri_{tnum}"
                     _parameters[key] = p.value
                     _distributions[key] = p.distribution.dict() \
                         if p.distribution else None
@@ -157,17 +160,18 @@ class PetriNetModel:
                     json.dumps(_distributions, sort_keys=True)
 
             self.transitions.append(transition_dict)
-            for c in transition.control:
-                self.inputs.append({'is': self.vmap[c.key],
-                                    'it': idx + 1})
-                self.outputs.append({'os': self.vmap[c.key],
-                                     'ot': idx + 1})
-            for c in transition.consumed:
-                self.inputs.append({'is': self.vmap[c.key],
-                                    'it': idx + 1})
-            for p in transition.produced:
-                self.outputs.append({'os': self.vmap[p.key],
-                                     'ot': idx + 1})
+            # Controllers are both inputs and outputs of a transition
+            control_indices = [vmap[c.key] for c in transition.control]
+            self.inputs.extend(
+                {'is': vidx, 'it': tnum}
+                for vidx in control_indices
+                + [vmap[c.key] for c in transition.consumed]
+            )
+            self.outputs.extend(
+                {'os': vidx, 'ot': tnum}
+                for vidx in control_indices
+                + [vmap[p.key] for p in transition.produced]
+            )
         for key, observable in model.observables.items():
             concept_data = {
                 'name': observable.observable.name,
@@ -184,8 +188,7 @@ class PetriNetModel:
                 p = model.parameters.get(parameter_name)
                 if p is None:
                     continue
-                key = sanitize_parameter_name(
-                    p.key) if p.key else f"p_petri_{idx + 1}"
+                key = p.key if p.key else f"p_petri_{idx + 1}"
                 _parameters[key] = p.value
                 _distributions[key] = p.distribution.dict() \
                     if p.distribution else None
@@ -217,7 +220,22 @@ class PetriNetModel:
         }
 
     def to_pydantic(self):
-        return PetriNetResponse(**self.to_json())
+        """Return a Pydantic model representation of the Petri net model.
+
+        The states, transitions, inputs and outputs were all built from the
+        transition model here, so they are not validated again.
+        """
+        return PetriNetResponse.construct(
+            S=[State.construct(sname=s['sname'], sprop=s.get('sprop'))
+               for s in self.states],
+            T=[Transition.construct(tname=t['tname'], rate=t.get('rate'),
+                                    tprop=t.get('tprop'))
+               for t in self.transitions],
+            I=[Input.construct(source=i['is'], transition=i['it'])
+               for i in self.inputs],
+            O=[Output.construct(source=o['os'], transition=o['ot'])
+               for o in self.outputs],
+        )
 
     def to_json_str(self):
         """Return a JSON string representation of the Petri net model."""
@@ -227,4 +245,4 @@ class PetriNetModel:
         """Write the Petri net model to a JSON file."""
         js = self.to_json()
         with open(fname, 'w') as fh:
-            json.dump(js, fh, **kwargs)
+            fh.write(json.dumps(js, **kwargs))
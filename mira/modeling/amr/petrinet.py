@@ -59,8 +59,9 @@ class AMRPetriNetModel:
         for key, var in model.variables.items():
             # Use the variable's concept name if possible but fall back
             # on the key otherwise
-            vmap[key] = name = var.concept.name or str(key)
-            display_name = var.concept.display_name or name
+            concept = var.concept
+            vmap[key] = name = concept.name or str(key)
+            display_name = concept.display_name or name
             # State structure
             # {
             #   'id': str,
@@ -72,16 +73,16 @@ class AMRPetriNetModel:
                 'name': display_name,
                 'grounding': {
                     'identifiers': {k: v for k, v in
-                                    var.concept.identifiers.items()
+                                    concept.identifiers.items()
                                     if k != 'biomodels.species'},
-                    'modifiers': var.concept.context,
+                    'modifiers': concept.context,
                 },
             }
-            if var.concept.units:
+            if concept.units:
                 states_dict['units'] = {
-                    'expression': str(var.concept.units.expression),
+                    'expression': str(concept.units.expression),
                     'expression_mathml': expression_to_mathml(
-                        var.concept.units.expression.args[0]
+                        concept.units.expression.args[0]
                     ),
                 }
 
@@ -145,18 +146,12 @@ class AMRPetriNetModel:
             # fixme: get grounding for transition
             transition_dict = {"id": tid}
 
-            inputs = []
-            outputs = []
-            for c in transition.control:
-                inputs.append(vmap[c.key])
-                outputs.append(vmap[c.key])
-            for c in transition.consumed:
-                inputs.append(vmap[c.key])
-            for p in transition.produced:
-                outputs.append(vmap[p.key])
-
-            transition_dict['input'] = inputs
-            transition_dict['output'] = outputs
+            # Controllers are both inputs and outputs of a transition
+            controllers = [vmap[c.key] for c in transition.control]
+            transition_dict['input'] = \
+                controllers + [vmap[c.key] for c in transition.consumed]
+            transition_dict['output'] = \
+                controllers + [vmap[p.key] for p in transition.produced]
 
             # Include rate law
             if transition.template.rate_law:
@@ -325,13 +320,13 @@ class AMRPetriNetModel:
         model_version : str, optional
             The version of the model.
         kwargs :
-            Additional keyword arguments to pass to :func:`json.dump`.
+            Additional keyword arguments to pass to :func:`json.dumps`.
         """
         indent = kwargs.pop('indent', 1)
         js = self.to_json(name=name, description=description,
                           model_version=model_version)
         with open(fname, 'w') as fh:
-            json.dump(js, fh, indent=indent, **kwargs)
+            fh.write(json.dumps(js, indent=indent, **kwargs))
 
 
 def template_model_to_petrinet_json(tm: TemplateModel):
@@ -360,12 +360,12 @@ class AMRRegNetModel:
         model_version :
             The version of the model. Defaults to 0.1
         **kwargs :
-            Keyword arguments to be passed to json.dump
+            Keyword arguments to be passed to json.dumps
         """
         js = self.to_json(name=name, description=description,
                           model_version=model_version)
         with open(fname, 'w') as fh:
-            json.dump(js, fh, **kwargs)
+            fh.write(json.dumps(js, **kwargs))
 
 
 def template_model_to_regnet_json(tm: TemplateModel):
@@ -86,4 +86,4 @@ class BilayerModel:
             The file path to save the bilayer to.
         """
         with open(fname, 'w') as fh:
-            json.dump(self.bilayer, fh, indent=1)
+            fh.write(json.dumps(self.bilayer, indent=1))
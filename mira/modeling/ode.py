@@ -73,7 +73,11 @@ class OdeModel:
             for p in transition.produced:
                 self.kinetics[self.vmap[p.key]] += rate
         self.kinetics = sympy.Matrix(self.kinetics)
-        self.kinetics_lmbd = sympy.lambdify([self.y], self.kinetics)
+        # Rate laws often share subexpressions (e.g., the total population),
+        # so common subexpression elimination keeps the generated function
+        # from recomputing them on every right-hand side evaluation
+        self.kinetics_lmbd = sympy.lambdify([self.y], self.kinetics,
+                                            cse=True)
 
         observables = []
         for obs_name, model_obs in model.observables.items():
@@ -93,7 +97,8 @@ class OdeModel:
                     assert False, sym_str
             observables.append(expr)
         self.observables = sympy.Matrix(observables)
-        self.observables_lmbd = sympy.lambdify([self.y], self.observables)
+        self.observables_lmbd = sympy.lambdify([self.y], self.observables,
+                                               cse=True)
 
     def get_interpretable_kinetics(self):
         # Return kinetics but with y and p substituted
@@ -109,8 +114,9 @@ class OdeModel:
         for p, v in params.items():
             self.kinetics = self.kinetics.subs(self.p[self.pmap[p]], v)
             self.observables = self.observables.subs(self.p[self.pmap[p]], v)
-        self.kinetics_lmbd = sympy.lambdify([self.y], self.kinetics)
-        self.observables_lmbd = sympy.lambdify([self.y], self.observables)
+        self.kinetics_lmbd = sympy.lambdify([self.y], self.kinetics, cse=True)
+        self.observables_lmbd = sympy.lambdify([self.y], self.observables,
+                                               cse=True)
 
     def get_rhs(self):
         """Return the right-hand side of the ODE system."""
@@ -43,22 +43,28 @@ def template_model_from_bilayer(bilayer_json) -> TemplateModel:
                 for idx, q in enumerate(bilayer_json['Qin'])}
     boxes = [{'inputs': [], 'outputs': [], 'controllers': []}
              for _ in range(len(bilayer_json['Box']))]
+    # The names of each box's inputs, kept separately so that controllers
+    # can be checked against them without comparing concepts one by one
+    box_input_names = [set() for _ in boxes]
     for consumption in bilayer_json['Wn']:
-        boxes[consumption['efflux'] - 1]['inputs'].append(
-            concepts[consumption['effusion']])
+        concept = concepts[consumption['effusion']]
+        boxes[consumption['efflux'] - 1]['inputs'].append(concept)
+        box_input_names[consumption['efflux'] - 1].add(concept.name)
     for production in bilayer_json['Wa']:
         boxes[production['influx'] - 1]['outputs'].append(
             concepts[production['infusion']])
     for control in bilayer_json['Win']:
-        if concepts[control['arg']] not in boxes[control['call'] - 1]['inputs']:
-            boxes[control['call'] - 1]['controllers'].append(
-                concepts[control['arg']])
-    for idx, box in enumerate(bilayer_json['Box']):
-        boxes[idx]['rate_law'] = sympy.Symbol(box['parameter'])
-        for input in boxes[idx]['inputs']:
-            boxes[idx]['rate_law'] *= sympy.Symbol(input.name)
-        for controller in boxes[idx]['controllers']:
-            boxes[idx]['rate_law'] *= sympy.Symbol(controller.name)
+        concept = concepts[control['arg']]
+        if concept.name not in box_input_names[control['call'] - 1]:
+            boxes[control['call'] - 1]['controllers'].append(concept)
+    for box_data, box in zip(bilayer_json['Box'], boxes):
+        # Build the mass-action rate law as a single product rather than
+        # multiplying in one factor at a time
+        box['rate_law'] = sympy.Mul(
+            sympy.Symbol(box_data['parameter']),
+            *(sympy.Symbol(concept.name)
+              for concept in box['inputs'] + box['controllers'])
+        )
 
     templates = []
     for box in boxes:
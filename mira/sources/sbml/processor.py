@@ -5,12 +5,12 @@ Alternate XPath queries for COPASI data:
 2. ``copasi:COPASI/rdf:RDF/rdf:Description/CopasiMT:is``
 """
 
-import copy
 import csv
 from collections import defaultdict
-from copy import deepcopy
+from functools import lru_cache
 import logging
 import math
+import re
 from typing import Dict, Iterable, List, Mapping, Optional, Tuple
 
 import bioregistry
@@ -68,25 +68,107 @@ PROPERTIES_XPATH = f"rdf:RDF/rdf:Description/bqbiol:hasProperty/rdf:Bag/rdf:li"
 #: This query helps get annotations on reactions, like "this reaction is a
 #: _protein-containing complex disassembly_ (GO:0043624)"
 IS_VERSION_XPATH = f"rdf:RDF/rdf:Description/bqbiol:hasProperty/rdf:Bag/rdf:li"
+#: This XPath query gets the identifiers of a model, e.g., its BioModels ID
+MODEL_ID_XPATH = "rdf:RDF/rdf:Description/bqmodel:is/rdf:Bag/rdf:li"
+
+#: The relations used to annotate models, by the name of the field they
+#: are collected into
+MODEL_ANNOTATION_PREDICATES = {
+    # Publication: bqmodel:isDescribedBy
+    # Disease: bqbiol:is
+    # Taxa: bqbiol:hasTaxon
+    # Model type: bqbiol:hasProperty
+    'publications': 'bqmodel:isDescribedBy',
+    'diseases': 'bqbiol:is',
+    'taxa': 'bqbiol:hasTaxon',
+    'model_type': 'bqbiol:hasProperty',
+    'pathway': 'bqbiol:isVersionOf',  # points to pathways
+    # bqbiol:isPartOf used to point to pathways
+    # bqbiol:occursIn used to point to pathways - might be subtle distinction with process vs. pathway
+    'homolog_to': "bqbiol:isHomologTo",
+    "base_model": "bqmodel:isDerivedFrom",  # derived from other biomodel
+    'has_part': "bqbiol:hasPart",  # points to pathways
+}
+
+# The XPath queries above are run for every species and model so they are
+# compiled once here rather than on each call
+_IDENTIFIERS_XPATH = etree.XPath(IDENTIFIERS_XPATH, namespaces=PREFIX_MAP)
+_IDENTIFIERS_VERSION_XPATH = etree.XPath(IDENTIFIERS_VERSION_XPATH,
+                                         namespaces=PREFIX_MAP)
+_PROPERTIES_XPATH = etree.XPath(PROPERTIES_XPATH, namespaces=PREFIX_MAP)
+_MODEL_ID_XPATH = etree.XPath(MODEL_ID_XPATH, namespaces=PREFIX_MAP)
+_MODEL_ANNOTATION_XPATHS = {
+    key: etree.XPath(f'rdf:RDF/rdf:Description/{path}/rdf:Bag/rdf:li',
+                     namespaces=PREFIX_MAP)
+    for key, path in MODEL_ANNOTATION_PREDICATES.items()
+}
+_COPASI_DESCR_XPATH = etree.XPath(COPASI_DESCR_XPATH, namespaces=PREFIX_MAP)
+_COPASI_HAS_PROPERTY = etree.XPath(COPASI_HAS_PROPERTY, namespaces=PREFIX_MAP)
+#: Matches characters that make a species name unusable as a symbol in
+#: formulas, in which case the species ID is used instead
+_INVALID_SYMBOL_NAME_RE = re.compile(r'[()+\-]')
+
+#: Rules for cleaning up the identifiers of species, applied in order. Each
+#: rule is given as the identifiers that all need to be present for it to
+#: apply, the identifiers to remove, the identifiers to add and the context
+#: to set on the concept.
+_IDENTIFIER_REMAP_RULES: List[
+    Tuple[frozenset, frozenset, Tuple[Tuple[str, str], ...], Dict[str, str]]
+] = [
+    # Fix IDO being used as the prefix for an NCIT term
+    (frozenset({('ido', 'C101887')}), frozenset({('ido', 'C101887')}),
+     (('ncit', 'C101887'),), {}),
+    # This is generic COVID-19 infection, generally not needed
+    (frozenset({('ncit', 'C171133')}), frozenset({('ncit', 'C171133')}),
+     (), {}),
+    # Reclassify asymptomatic as a disease status
+    (frozenset({('ido', '0000569'), ('ido', '0000511')}),
+     frozenset({('ido', '0000569')}), (), {'disease_status': 'ncit:C3833'}),
+    # Exposed shouldn't be susceptible
+    (frozenset({('ido', '0000514'), ('ido', '0000597')}),
+     frozenset({('ido', '0000514')}), (), {}),
+    # Break apart hospitalized and ICU
+    (frozenset({('ncit', 'C25179'), ('ncit', 'C53511')}),
+     frozenset({('ncit', 'C53511')}), (), {'disease_status': 'ncit:C53511'}),
+    # Remove redundant term for deceased due to disease progression
+    (frozenset({('ncit', 'C28554'), ('ncit', 'C168970')}),
+     frozenset({('ncit', 'C168970')}), (), {}),
+]
 
 
 class Converter:
-    """Wrapper around a curies converter with lazy loading."""
+    """Wrapper around a curies converter with lazy loading.
+
+    Results are cached since the same URIs (e.g., for taxa or common
+    ontology terms) come up again and again across species and models.
+    """
 
     def __init__(self):
         self.converter = None
+        self._parse_cache: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        self._curie_cache: Dict[str, Optional[str]] = {}
 
     def parse_uri(self, uri):
         """Parse a URI into a prefix/identifier pair."""
+        try:
+            return self._parse_cache[uri]
+        except KeyError:
+            pass
         if self.converter is None:
             self.converter = bioregistry.get_converter(include_prefixes=True)
-        return self.converter.parse_uri(uri)
+        rv = self._parse_cache[uri] = self.converter.parse_uri(uri)
+        return rv
 
     def uri_to_curie(self, uri: str) -> Optional[str]:
         """Turn a URI into a CURIE."""
+        try:
+            return self._curie_cache[uri]
+        except KeyError:
+            pass
         if self.converter is None:
             self.converter = bioregistry.get_converter(include_prefixes=True)
-        return self.converter.compress(uri)
+        rv = self._curie_cache[uri] = self.converter.compress(uri)
+        return rv
 
 
 converter = Converter()
@@ -103,16 +185,25 @@ class SbmlProcessor:
         self.units = get_units(self.sbml_model.unit_definitions)
 
     def extract_model(self):
+        # The model annotation is parsed once and shared by the extractors
+        annotation_tree = get_model_annotation_tree(self.sbml_model)
         if self.model_id is None:
-            self.model_id = get_model_id(self.sbml_model)
-        model_annots = get_model_annotations(self.sbml_model)
-        reporter_ids = set(self.reporter_ids or [])
+            self.model_id = get_model_id(self.sbml_model,
+                                         annotation_tree=annotation_tree)
+        model_annots = get_model_annotations(self.sbml_model,
+                                             annotation_tree=annotation_tree)
         concepts = self._extract_concepts()
+        # Reporter species and cumulative counts aren't part of the model's
+        # dynamics so they are left out of the templates
+        excluded_ids = frozenset(self.reporter_ids or []) | frozenset(
+            species_id for species_id in concepts
+            if 'cumulative' in species_id
+        )
 
         def _lookup_concepts_filtered(species_ids) -> List[Concept]:
             return [
                 concepts[species_id] for species_id in species_ids
-                if species_id not in reporter_ids and 'cumulative' not in species_id
+                if species_id not in excluded_ids
             ]
 
         # Iterate thorugh all reactions and piecewise convert to templates
@@ -120,23 +211,23 @@ class SbmlProcessor:
         # see docs on reactions
         # https://sbml.org/software/libsbml/5.18.0/docs/formatted/python-api/
         # classlibsbml_1_1_reaction.html
-        all_species = {species.id for species in self.sbml_model.species}
-
-        all_parameters = {
-            parameter.id: {
+        all_species = frozenset(species.id
+                                for species in self.sbml_model.species)
+
+        all_parameters = {}
+        parameter_symbols = {}
+        for parameter in self.sbml_model.parameters:
+            parameter_id = parameter.id
+            all_parameters[parameter_id] = {
                 'value': parameter.value,
                 'description': parameter.name,
                 'units': self.get_object_units(parameter)
             }
-            for parameter in self.sbml_model.parameters
-        }
-        parameter_symbols = \
-            {parameter.id: sympy.Symbol(parameter.id)
-             for parameter in self.sbml_model.parameters}
-        compartment_symbols = {compartment.id: sympy.Symbol(compartment.id)
-                               for compartment in self.sbml_model.compartments}
+            parameter_symbols[parameter_id] = sympy.Symbol(parameter_id)
+        compartment_symbols = {}
         # Add compartment volumes as parameters
         for compartment in self.sbml_model.compartments:
+            compartment_symbols[compartment.id] = sympy.Symbol(compartment.id)
             all_parameters[compartment.id] = {'value': compartment.volume,
                                               'description': compartment.name,
                                               'units': self.get_object_units(compartment)}
@@ -160,19 +251,17 @@ class SbmlProcessor:
 
         # In formulas, the species ID appears instead of the species name
         # and so we have to map these to symbols corresponding to the species name
-        species_id_map = {
-            species.id: (sympy.Symbol(species.name)
-                         if (species.name and '(' not in species.name
-                             and '-' not in species.name
-                             and '+' not in species.name)
-                         else sympy.Symbol(species.id))
-            for species in self.sbml_model.species
-        }
-
-        all_locals = {k: v for k, v in (list(parameter_symbols.items()) +
-                                        list(compartment_symbols.items()) +
-                                        list(function_lambdas.items()) +
-                                        list(species_id_map.items()))}
+        species_id_map = {}
+        for species in self.sbml_model.species:
+            species_name = species.name
+            if species_name and \
+                    not _INVALID_SYMBOL_NAME_RE.search(species_name):
+                species_id_map[species.id] = sympy.Symbol(species_name)
+            else:
+                species_id_map[species.id] = sympy.Symbol(species.id)
+
+        all_locals = {**parameter_symbols, **compartment_symbols,
+                      **function_lambdas, **species_id_map}
 
         # Handle custom assignment rules in the model
         assignment_rules = {}
@@ -180,6 +269,20 @@ class SbmlProcessor:
             rule_expr = parse_assignment_rule(rule.formula, all_locals)
             if rule_expr:
                 assignment_rules[rule.id] = rule_expr
+        # Rules can refer to the variables of other rules, so we substitute
+        # them into each other up front. This way, a single pass of
+        # substitution is enough for each rate law.
+        assignment_rule_symbols = {sympy.Symbol(rule_id): rule_expr
+                                   for rule_id, rule_expr
+                                   in assignment_rules.items()}
+        for _ in range(len(assignment_rule_symbols)):
+            flattened_rules = {
+                rule_symbol: rule_expr.xreplace(assignment_rule_symbols)
+                for rule_symbol, rule_expr in assignment_rule_symbols.items()
+            }
+            if flattened_rules == assignment_rule_symbols:
+                break
+            assignment_rule_symbols = flattened_rules
 
         all_implicit_modifiers = set()
         implicit_modifiers = None
@@ -212,30 +315,42 @@ class SbmlProcessor:
             rate_expr = safe_parse_expr(rate_law.formula,
                                         local_dict=all_locals)
             # At this point we need to make sure we substitute the assignments
-            rate_expr = rate_expr.subs(assignment_rules)
-
+            if any(symbol.name in assignment_rules
+                   for symbol in rate_expr.free_symbols):
+                rate_expr = rate_expr.xreplace(assignment_rule_symbols)
+
+            # Only the compartments that appear in the rate law need to be
+            # handled, and the values of those that aren't removed below are
+            # substituted all at once at the end
+            rate_law_symbols = rate_expr.free_symbols
+            compartment_values = {}
             for comp, comp_symbol in compartment_symbols.items():
+                if comp_symbol not in rate_law_symbols:
+                    continue
                 # We want to handle the special case where the compartment is
                 # just a constant 1.0 and so we can just remove it from the
                 # rate expression but that requires some special handling otherwise
                 # and explicit 1.0 will be carried around in the rate expression
                 comp_one = False
-                if comp_symbol in rate_expr.free_symbols:
-                    if rate_expr not in rate_expr.diff(comp_symbol).free_symbols:
-                        if all_parameters[comp]['value'] == 1.0:
-                            comp_one = True
-                            rate_expr /= comp_symbol
+                if rate_expr not in rate_expr.diff(comp_symbol).free_symbols:
+                    if all_parameters[comp]['value'] == 1.0:
+                        comp_one = True
+                        rate_expr /= comp_symbol
                 if not comp_one:
-                    rate_expr = rate_expr.subs(comp_symbol,
-                                               all_parameters[comp]['value'])
+                    compartment_values[comp_symbol] = \
+                        sympy.sympify(all_parameters[comp]['value'])
+            if compartment_values:
+                rate_expr = rate_expr.xreplace(compartment_values)
 
             rate_law_variables = variables_from_sympy_expr(rate_expr)
 
             # Implicit modifiers appear in the rate law but are not reactants and
             # aren't listed explicitly as modifiers. They have to be proper species
             # though (since the rate law also contains parameters).
-            implicit_modifiers = ((set(rate_law_variables) & all_species)
-                                  - (set(reactant_species) | set(modifier_species)))
+            explicit_species = set(reactant_species)
+            explicit_species.update(modifier_species)
+            implicit_modifiers = \
+                (rate_law_variables & all_species) - explicit_species
             # We extend modifiers with implicit ones
             modifier_species += sorted(implicit_modifiers)
             all_implicit_modifiers |= implicit_modifiers
@@ -348,7 +463,11 @@ class SbmlProcessor:
         """Extract concepts from an SBML model."""
         concepts = {}
         # see https://sbml.org/software/libsbml/5.18.0/docs/formatted/python-api/classlibsbml_1_1_species.html
-        for species in self.sbml_model.getListOfSpecies():
+        # Indexing into the model is cheaper than going through the
+        # wrapped ListOfSpecies iterator
+        sbml_model = self.sbml_model
+        for idx in range(sbml_model.getNumSpecies()):
+            species = sbml_model.getSpecies(idx)
             # Extract the units for the species
             units = self.get_object_units(species)
             concept = _extract_concept(species, model_id=self.model_id,
@@ -395,7 +514,10 @@ unit_expression_mappings = {
 
 def process_unit_definition(unit_definition):
     """Process a unit definition block to extract an expression."""
-    full_unit_expr = sympy.Integer(1)
+    # The numerical factors are accumulated separately from the unit
+    # symbols so that the expression is only put together once
+    coefficient = 1
+    unit_factors = []
     for unit in unit_definition.units:
         unit_symbol_str = SBML_UNITS[unit.kind]
         # We assume person instead of item here
@@ -404,12 +526,13 @@ def process_unit_definition(unit_definition):
         unit_symbol = sympy.Symbol(unit_symbol_str)
         # We do this to avoid the spurious factors in the expression
         if unit.multiplier != 1:
-            unit_symbol *= unit.multiplier
+            coefficient *= unit.multiplier ** unit.exponent
         if unit.exponent != 1:
             unit_symbol **= unit.exponent
         if unit.scale != 0:
-            unit_symbol *= 10 ** unit.scale
-        full_unit_expr *= unit_symbol
+            coefficient *= 10 ** unit.scale
+        unit_factors.append(unit_symbol)
+    full_unit_expr = sympy.Mul(coefficient, *unit_factors)
     # We apply some mappings for canonical units we want to change
     # We use equals here since == in sympy is structural equality
     for k, v in unit_expression_mappings.items():
@@ -418,32 +541,28 @@ def process_unit_definition(unit_definition):
     return full_unit_expr
 
 
-def get_model_annotations(sbml_model) -> Annotations:
-    """Get the model annotations from the SBML model."""
+def get_model_annotation_tree(sbml_model):
+    """Parse the annotation XML of the SBML model, if it has one."""
     ann_xml = sbml_model.getAnnotationString()
     if not ann_xml:
         return None
-    et = etree.fromstring(ann_xml)
-    # Publication: bqmodel:isDescribedBy
-    # Disease: bqbiol:is
-    # Taxa: bqbiol:hasTaxon
-    # Model type: bqbiol:hasProperty
-    annot_structure = {
-        'publications': 'bqmodel:isDescribedBy',
-        'diseases': 'bqbiol:is',
-        'taxa': 'bqbiol:hasTaxon',
-        'model_type': 'bqbiol:hasProperty',
-        'pathway': 'bqbiol:isVersionOf',  # points to pathways
-        # bqbiol:isPartOf used to point to pathways
-        # bqbiol:occursIn used to point to pathways - might be subtle distinction with process vs. pathway
-        'homolog_to': "bqbiol:isHomologTo",
-        "base_model": "bqmodel:isDerivedFrom",  # derived from other biomodel
-        'has_part': "bqbiol:hasPart",  # points to pathways
-    }
+    return etree.fromstring(ann_xml)
+
+
+def get_model_annotations(sbml_model, annotation_tree=None) -> Annotations:
+    """Get the model annotations from the SBML model.
+
+    If the model's annotation tree has already been parsed with
+    :func:`get_model_annotation_tree`, it can be passed as `annotation_tree`
+    to avoid parsing it again.
+    """
+    et = annotation_tree if annotation_tree is not None else \
+        get_model_annotation_tree(sbml_model)
+    if et is None:
+        return None
     annotations = defaultdict(list)
-    for key, path in annot_structure.items():
-        full_path = f'rdf:RDF/rdf:Description/{path}/rdf:Bag/rdf:li'
-        tags = et.findall(full_path, namespaces=PREFIX_MAP)
+    for key, xpath in _MODEL_ANNOTATION_XPATHS.items():
+        tags = xpath(et)
         if not tags:
             continue
         for tag in tags:
@@ -455,7 +574,7 @@ def get_model_annotations(sbml_model) -> Annotations:
                 continue
             annotations[key].append(curie)
 
-    model_id = get_model_id(sbml_model)
+    model_id = get_model_id(sbml_model, annotation_tree=et)
     if model_id and model_id.startswith("BIOMD"):
         license = "CC0"
     else:
@@ -500,9 +619,10 @@ def get_model_annotations(sbml_model) -> Annotations:
 
 
 def _curie_is_ncit_disease(curie: str) -> bool:
-    prefix, identifier = bioregistry.parse_curie(curie)
-    if prefix != "ncit":
+    # A cheap prefix check rules out most CURIEs before any parsing
+    if not curie.startswith("ncit:"):
         return False
+    identifier = curie[len("ncit:"):]
     try:
         import pyobo
     except ImportError:
@@ -512,14 +632,18 @@ def _curie_is_ncit_disease(curie: str) -> bool:
         return False
 
 
-def get_model_id(sbml_model):
-    """Get the model ID from the SBML model annotation."""
-    ann_xml = sbml_model.getAnnotationString()
-    if not ann_xml:
+def get_model_id(sbml_model, annotation_tree=None):
+    """Get the model ID from the SBML model annotation.
+
+    If the model's annotation tree has already been parsed with
+    :func:`get_model_annotation_tree`, it can be passed as `annotation_tree`
+    to avoid parsing it again.
+    """
+    et = annotation_tree if annotation_tree is not None else \
+        get_model_annotation_tree(sbml_model)
+    if et is None:
         return None
-    et = etree.fromstring(ann_xml)
-    id_tags = et.findall('rdf:RDF/rdf:Description/bqmodel:is/rdf:Bag/rdf:li',
-                         namespaces=PREFIX_MAP)
+    id_tags = _MODEL_ID_XPATH(et)
     for id_tag in id_tags:
         uri = id_tag.attrib.get(RESOURCE_KEY)
         if uri:
@@ -552,6 +676,7 @@ def replace_constant_concepts(template_model: TemplateModel, candidates=None):
     # to those
     if candidates is not None:
         constant_concepts &= candidates
+    constant_values = {}
     for constant_concept in constant_concepts:
         initial = template_model.initials.get(constant_concept)
         if initial is not None:
@@ -563,16 +688,21 @@ def replace_constant_concepts(template_model: TemplateModel, candidates=None):
         # Get the units of the concept here
         template_model.parameters[constant_concept] = \
             Parameter(name=constant_concept, value=float(initial_expression.args[0]))
-        new_templates = []
-        for template in template_model.templates:
+        constant_values[constant_concept] = initial_expression.args[0]
+    if not constant_values:
+        return template_model
+    # Each template is visited once, replacing all the constant controllers
+    # it has in turn, rather than going over all templates for each constant
+    new_templates = []
+    for template in template_model.templates:
+        for constant_concept, value in constant_values.items():
             new_template = replace_controller_by_constant(template,
                                                           constant_concept,
-                                                          initial_expression.args[0])
+                                                          value)
             if new_template:
-                new_templates.append(new_template)
-            else:
-                new_templates.append(template)
-        template_model.templates = new_templates
+                template = new_template
+        new_templates.append(template)
+    template_model.templates = new_templates
     return template_model
 
 
@@ -583,7 +713,8 @@ def replace_controller_by_constant(template, controller_name, value):
                 subject=template.subject,
                 outcome=template.outcome,
             )
-            new_template.rate_law = template.rate_law.subs(controller_name, value)
+            new_template.rate_law = template.rate_law.xreplace(
+                {sympy.Symbol(controller_name): sympy.sympify(value)})
             return new_template
     elif isinstance(template, GroupedControlledConversion):
         if len(template.controllers) > 2:
@@ -592,7 +723,8 @@ def replace_controller_by_constant(template, controller_name, value):
                 outcome=template.outcome,
                 controllers=[c for c in template.controllers if c.name != controller_name],
             )
-            new_template.rate_law = template.rate_law.subs(controller_name, value)
+            new_template.rate_law = template.rate_law.xreplace(
+                {sympy.Symbol(controller_name): sympy.sympify(value)})
             return new_template
         else:
             # If there are only two controllers, we can replace the
@@ -602,7 +734,8 @@ def replace_controller_by_constant(template, controller_name, value):
                 outcome=template.outcome,
                 controller=template.controllers[0],
             )
-            new_template.rate_law = template.rate_law.subs(controller_name, value)
+            new_template.rate_law = template.rate_law.xreplace(
+                {sympy.Symbol(controller_name): sympy.sympify(value)})
             return new_template
     # TODO: potentially handle other template types
     return
@@ -616,20 +749,23 @@ def parse_assignment_rule(rule, locals):
         return None
 
 
+#: The infix operators for the libSBML AST operator names that can appear
+#: in function definitions
+FORMULA_OPERATORS = {
+    'times': '*',
+    'plus': '+',
+    'divide': '/',
+    'minus': '-',
+}
+
+
 def get_formula_str(ast_node):
     name = ast_node.getName()
     if not name:
         op = ast_node.getOperatorName()
         if op:
-            if op == 'times':
-                op_str = '*'
-            elif op == 'plus':
-                op_str = '+'
-            elif op == 'divide':
-                op_str = '/'
-            elif op == 'minus':
-                op_str = '-'
-            else:
+            op_str = FORMULA_OPERATORS.get(op)
+            if op_str is None:
                 print('Unknown op: %s' % op)
                 assert False
             # Special case where we have a unary minus
@@ -650,15 +786,8 @@ def get_formula_str(ast_node):
 
 
 def variables_from_sympy_expr(expr):
-    """Recursively find variables appearing in a sympy expression."""
-    variables = set()
-    if isinstance(expr, sympy.Symbol):
-        variables.add(expr.name)
-    else:
-        assert isinstance(expr, sympy.Expr)
-        for arg in expr.args:
-            variables |= variables_from_sympy_expr(arg)
-    return variables
+    """Find the names of variables appearing in a sympy expression."""
+    return {symbol.name for symbol in expr.free_symbols}
 
 
 def variables_from_ast(ast_node):
@@ -699,8 +828,10 @@ def _extract_concept(species, units=None, model_id=None):
         concept = Concept(
             name=species_name,
             display_name=display_name,
-            identifiers=copy.deepcopy(mapped_ids),
-            context=copy.deepcopy(mapped_context),
+            # The groundings map strings to strings so a shallow copy is
+            # enough to keep the concept from sharing them with the map
+            identifiers=dict(mapped_ids),
+            context=dict(mapped_context),
             units=units
         )
         return concept
@@ -711,8 +842,11 @@ def _extract_concept(species, units=None, model_id=None):
     # various normalizations and clean up.
 
     # The following traverses the annotations tag, which allows for
-    # embedding arbitrary XML content. Typically, this is RDF.
-    annotation_string = species.getAnnotationString()
+    # embedding arbitrary XML content. Typically, this is RDF. We check
+    # whether there is an annotation first so that the annotation string
+    # doesn't have to be serialized for species that don't have one.
+    annotation_string = species.getAnnotationString() \
+        if species.isSetAnnotation() else None
     if not annotation_string:
         logger.debug(f"[{model_id} species:{species_id}] had no annotations")
         concept = Concept(name=species_name, display_name=display_name,
@@ -723,42 +857,28 @@ def _extract_concept(species, units=None, model_id=None):
 
     rdf_properties = [
         converter.parse_uri(desc.attrib[RESOURCE_KEY])
-        for desc in
-        annotation_tree.findall(PROPERTIES_XPATH, namespaces=PREFIX_MAP)
+        for desc in _PROPERTIES_XPATH(annotation_tree)
     ]
 
     # First we check identifiers with a specific relation representing
     # equivalence
     identifiers_list = []
-    for element in annotation_tree.findall(IDENTIFIERS_XPATH,
-                                           namespaces=PREFIX_MAP):
+    for element in _IDENTIFIERS_XPATH(annotation_tree):
         curie = converter.parse_uri(element.attrib[RESOURCE_KEY])
         identifiers_list.append(curie)
 
     context = {}
-    if ('ido', 'C101887') in identifiers_list:
-        identifiers_list.remove(('ido', 'C101887'))
-        identifiers_list.append(('ncit', 'C101887'))
-    if ('ncit', 'C171133') in identifiers_list:
-        identifiers_list.remove(('ncit', 'C171133'))
-    # Reclassify asymptomatic as a disease status
-    if ('ido', '0000569') in identifiers_list and \
-            ('ido', '0000511') in identifiers_list:
-        identifiers_list.remove(('ido', '0000569'))
-        context['disease_status'] = 'ncit:C3833'
-    # Exposed shouldn't be susceptible
-    if ('ido', '0000514') in identifiers_list and \
-            ('ido', '0000597') in identifiers_list:
-        identifiers_list.remove(('ido', '0000514'))
-    # Break apoart hospitalized and ICU
-    if ('ncit', 'C25179') in identifiers_list and \
-            ('ncit', 'C53511') in identifiers_list:
-        identifiers_list.remove(('ncit', 'C53511'))
-        context['disease_status'] = 'ncit:C53511'
-    # Remove redundant term for deceased due to disease progression
-    if ('ncit', 'C28554') in identifiers_list and \
-            ('ncit', 'C168970') in identifiers_list:
-        identifiers_list.remove(('ncit', 'C168970'))
+    present = set(identifiers_list)
+    for required, to_remove, to_add, rule_context in _IDENTIFIER_REMAP_RULES:
+        if required <= present:
+            # The list is kept (rather than only the set) so that the order
+            # of the identifiers is preserved
+            identifiers_list = [curie for curie in identifiers_list
+                                if curie not in to_remove]
+            identifiers_list.extend(to_add)
+            present -= to_remove
+            present.update(to_add)
+            context.update(rule_context)
 
     identifiers = dict(identifiers_list)
     if len(identifiers) != len(identifiers_list):
@@ -778,8 +898,7 @@ def _extract_concept(species, units=None, model_id=None):
     if not identifiers:
         elements = sorted([
             converter.parse_uri(element.attrib[RESOURCE_KEY])
-            for element in annotation_tree.findall(IDENTIFIERS_VERSION_XPATH,
-                                                   namespaces=PREFIX_MAP)
+            for element in _IDENTIFIERS_VERSION_XPATH(annotation_tree)
         ], reverse=True)
         # This is generic COVID-19 infection, generally not needed
         if ('ncit', 'C171133') in elements:
@@ -821,8 +940,30 @@ def _extract_concept(species, units=None, model_id=None):
 
 
 def grounding_normalize(concept):
+    identifiers, context = _normalize_grounding(
+        tuple(concept.identifiers.items()), tuple(concept.context.items())
+    )
+    concept.identifiers = dict(identifiers)
+    concept.context = dict(context)
+    return concept
+
+
+@lru_cache(maxsize=4096)
+def _normalize_grounding(
+    identifiers: Tuple[Tuple[str, str], ...],
+    context: Tuple[Tuple[str, str], ...],
+) -> Tuple[Tuple[Tuple[str, str], ...], Tuple[Tuple[str, str], ...]]:
+    """Normalize groundings given as tuples of items so they can be cached.
+
+    The same groundings come up for many species across models, so the
+    result is cached on the identifiers and context.
+    """
+    # Only the identifiers matter for getting the CURIE so the name is
+    # left empty
+    concept = Concept.construct(name='', identifiers=dict(identifiers),
+                                context=dict(context))
     # A common curation mistake in BioModels: mixing up IDO and NCIT identifiers
-    for k, v in deepcopy(concept.identifiers).items():
+    for k, v in identifiers:
         if k == 'ncit' and v.startswith('000'):
             concept.identifiers.pop(k)
             concept.identifiers['ido'] = v
@@ -845,27 +986,32 @@ def grounding_normalize(concept):
     # Different terms for dead/deceased
     elif concept.get_curie() == ('ncit', 'C168970'):
         concept.identifiers = {'ncit': 'C28554'}
-    return concept
+    return tuple(concept.identifiers.items()), tuple(concept.context.items())
+
+
+@lru_cache(maxsize=None)
+def _compile_xpath(xpath: str) -> etree.XPath:
+    """Return a compiled XPath query using the SBML annotation prefixes."""
+    return etree.XPath(xpath, namespaces=PREFIX_MAP)
 
 
 def _get_copasi_identifiers(annotation_tree: etree, xpath: str) -> Dict[str, str]:
     # Use COPASI_IS or COPASI_IS_VERSION_OF for xpath depending on use case
     return dict(
-        tuple(el.attrib[RESOURCE_KEY].split(':')[-2:]) for el in
-        annotation_tree.xpath(xpath, namespaces=PREFIX_MAP)
+        tuple(el.attrib[RESOURCE_KEY].rsplit(':', 2)[-2:]) for el in
+        _compile_xpath(xpath)(annotation_tree)
     )
 
 
 def _get_copasi_props(annotation_tree: etree) -> List[Tuple[str, str]]:
     return [
-        tuple(el.attrib[RESOURCE_KEY].split(':')[-2:]) for el in
-        annotation_tree.xpath(COPASI_HAS_PROPERTY, namespaces=PREFIX_MAP)
+        tuple(el.attrib[RESOURCE_KEY].rsplit(':', 2)[-2:]) for el in
+        _COPASI_HAS_PROPERTY(annotation_tree)
     ]
 
 
 def _extract_all_copasi_attrib(species_annot_etree: etree) -> List[Tuple[str, str]]:
-    descr_tags = species_annot_etree.xpath(COPASI_DESCR_XPATH,
-                                           namespaces=PREFIX_MAP)
+    descr_tags = _COPASI_DESCR_XPATH(species_annot_etree)
     resources = []
     for descr_tag in descr_tags:
         for element in descr_tag.iter():
@@ -932,13 +1078,11 @@ def get_sbml_units():
 
     This is necessary because units are given as numbers.
     """
-    module_contents = dir(libsbml)
-    unit_kinds = {var: var.split('_')[-1].lower()
-                  for var in module_contents
-                  if var.startswith("UNIT_KIND")
-                  and var != "UNIT_KIND_INVALID"}
-    unit_kinds = {getattr(libsbml, var): unit_name
-                  for var, unit_name in unit_kinds.items()}
+    unit_kinds = {}
+    for var in dir(libsbml):
+        if var.startswith("UNIT_KIND") and var != "UNIT_KIND_INVALID":
+            unit_kinds[getattr(libsbml, var)] = \
+                var.rsplit('_', 1)[-1].lower()
     return unit_kinds
 
 
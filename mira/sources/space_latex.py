@@ -5,12 +5,11 @@ import json
 import os
 import re
 import sys
+from functools import lru_cache
 from typing import List, Union, Tuple, Optional, Callable
 
 import pandas as pd
 import sympy
-from matplotlib import pyplot as plt
-from matplotlib_venn import venn3
 from pandas import DataFrame
 from sympy import mathml, Mul
 from sympy.physics.units.definitions.dimension_definitions import (
@@ -104,6 +103,32 @@ DF_DATA_KEY = "data"
 VERSION_KEY = "version"
 DATE_KEY = "date"
 
+# Regular expressions used when parsing the LaTeX tables, compiled once here
+# since they are applied to every unit and row
+_MATHRM_RE = re.compile(r"\\mathrm\{(.+?)\}")
+_TEXTRM_RE = re.compile(r"\\textrm\{(.+?)\}")
+_UNIT_NAME_RE = re.compile(r"([a-zA-Z]+)\^?")
+_EXPONENT_RE = re.compile(r"\^\{?(-?\d+)\}?")
+# A single unit in the usual \mathrm{unit}^{exponent} form, which can be read
+# in one match instead of going through get_unit_name and get_exponent
+_MATHRM_UNIT_RE = re.compile(r"\\mathrm\{([a-zA-Z]+)\}(?:\^\{?(-?\d+)\}?)?")
+_TEXTBF_RE = re.compile(r"\\textbf\{(.+?)\}")
+_TEXTIT_RE = re.compile(r"\\textit\{(.+?)\}")
+_TEXT_RE = re.compile(r"\\text")
+_EQ_RE = re.compile(r"eq(\d+)")
+_VERSION_DATE_RE = re.compile(r"v(\d+\.\d+) \((\d+/\d+/\d+)\)")
+_TABLE_RE = re.compile(
+    r"\\begin\{(table|longtable)\}(.+?)\\end\{\1\}", re.DOTALL
+)
+# Lines before the header of a table that start with these are skipped
+_NON_HEADER_PREFIXES = ("%", "{", r"\hline")
+
+
+def _strip_row(row: str) -> List[str]:
+    r"""Split a table row into its stripped cells, dropping \\ and \hline."""
+    row = row.replace(r"\\", "").replace(r"\hline", "")
+    return [cell.strip() for cell in row.split("&")]
+
 
 # Support for sympy Dimension when loading from json
 def parse_sympy_dimension(sympy_str: Union[str, None]) -> Union[Mul, One, None]:
@@ -225,9 +250,9 @@ def get_unit_name(latex_str: str) -> str:
     # Check if \mathrm{...} is present
     if r"\mathrm" in latex_str or r"\textrm" in latex_str:
         # Get the unit name
-        unit_name = re.search(r"\\mathrm\{(.+?)\}", latex_str)
+        unit_name = _MATHRM_RE.search(latex_str)
         if unit_name is None:
-            unit_name = re.search(r"\\textrm\{(.+?)\}", latex_str)
+            unit_name = _TEXTRM_RE.search(latex_str)
 
         if unit_name is None:
             raise ValueError(
@@ -242,7 +267,7 @@ def get_unit_name(latex_str: str) -> str:
         if latex_str == "-":
             unit_name = "-"
         else:
-            match = re.search(r"([a-zA-Z]+)\^?", latex_str)
+            match = _UNIT_NAME_RE.search(latex_str)
             if match:
                 unit_name = match.group(1)
             else:
@@ -271,7 +296,7 @@ def get_exponent(latex_str: str) -> int:
         The exponent as an integer.
     """
     # Check for an exponent, e.g. ...^2 or ...^{-2} and get the value
-    exponent = re.search(r"\^\{?(-?\d+)\}?", latex_str)
+    exponent = _EXPONENT_RE.search(latex_str)
     if exponent:
         exponent = int(exponent.group(1))
     elif "^" in latex_str:
@@ -326,6 +351,14 @@ def get_unit_names_exponents(latex_str: str) -> List[Tuple[str, int]]:
         if unit == "-":
             # This is a dimensionless unit
             units_exponents.append((unit, 1))
+            continue
+
+        match = _MATHRM_UNIT_RE.fullmatch(unit)
+        if match:
+            unit_name, exponent = match.groups()
+            units_exponents.append(
+                (unit_name, int(exponent) if exponent else 1)
+            )
         else:
             unit_name = get_unit_name(unit)
             exponent = get_exponent(unit)
@@ -334,46 +367,17 @@ def get_unit_names_exponents(latex_str: str) -> List[Tuple[str, int]]:
     return units_exponents
 
 
+@lru_cache(maxsize=1024)
 def parse_sympy_dimensions(latex_str: str) -> Union[Dimension, One]:
     # The input is a string of the form:
     # $ \mathrm{...} \cdot \mathrm{...}^{-<int>} ... $ OR just a single unit
     # e.g. kg or m or s without the mathmode $...$, find the units and parse
     # them into a sympy expression
-
-    # Remove the $ at the beginning and end
-    latex_str = latex_str.strip("$")
-
-    if r"\cdot" in latex_str:
-        # Split the string into the units
-        units = latex_str.split(r"\cdot")
-    else:
-        units = [latex_str]
-
-    # Strip whitespace
-    units = [unit.strip() for unit in units]
-
     parsed = None
-    for unit in units:
-        if unit == "":
-            raise ValueError("Empty unit")
+    for unit_name, exponent in get_unit_names_exponents(latex_str):
+        assert unit_name in dimension_mapping, f"Unknown unit {unit_name}"
 
-        if unit == "-":
-            # This is a dimensionless unit
-            dim_unit = dimension_mapping[unit]
-
-        else:
-            # Get the exponent
-            exponent = get_exponent(unit)
-
-            # Strip off the exponent
-            parsed_unit = re.sub(r"\^\{?(-?\d+)\}?", "", unit)
-
-            # Get the unit name
-            unit_name = get_unit_name(parsed_unit)
-
-            assert unit_name in dimension_mapping, f"Unknown unit {unit_name}"
-
-            dim_unit = dimension_mapping[unit_name] ** exponent
+        dim_unit = dimension_mapping[unit_name] ** exponent
 
         if parsed is None:
             parsed = dim_unit
@@ -435,6 +439,52 @@ def unit_exponents_to_mathml_dim(units_exps: List[Tuple[str, int]]) -> str:
     return mathml(sympy_dim)
 
 
+@lru_cache(maxsize=1024)
+def _convert_si_units(latex_si_units: str):
+    """Get the dimensions and SI units of a LaTeX unit string.
+
+    The same units come up on many rows of a table, so the results are
+    cached.
+
+    Parameters
+    ----------
+    latex_si_units :
+        A latex string of SI units.
+
+    Returns
+    -------
+    :
+        A tuple of the dimensions as a sympy expression, the SI units as a
+        sympy expression, the SI units as MathML and the dimensions as
+        MathML.
+    """
+    units_exps = get_unit_names_exponents(latex_si_units)
+    return (
+        unit_exponents_to_sympy_dim(units_exps),
+        unit_exponents_to_sympy_si(units_exps),
+        unit_exponents_to_mathml_si(units_exps),
+        unit_exponents_to_mathml_dim(units_exps),
+    )
+
+
+def _get_askemosw_id(c: str) -> str:
+    """Add the 'askemosw:' prefix to bare askemosw ids.
+
+    The id column can contain digits only (0000001 -> askemosw:0000001) or
+    digits separated by a comma and/or slash, e.g.,
+    0000001,0000002/0000003 ->
+    askemosw:0000001,askemosw:0000002/askemosw:0000003
+    """
+    if "," in c:
+        return ",".join(_get_askemosw_id(cc) for cc in c.split(","))
+    elif "/" in c:
+        return "/".join(_get_askemosw_id(cc) for cc in c.split("/"))
+    elif c.isdigit():
+        return f"askemosw:{c}"
+    else:
+        return c
+
+
 def parse_table(raw_latex_table: str) -> DataFrame:
     # Assume this is the text between \begin{tabular} and \end{tabular}
     # (or 'longtable')
@@ -445,20 +495,17 @@ def parse_table(raw_latex_table: str) -> DataFrame:
     # Find the header row, skip the table description, i.e. {|c|c|p{
     # 2cm}|...} and comments
     header_row = next(rows_iter)
-    while header_row.strip().startswith(("%", "{", r"\hline")):
+    while header_row.strip().startswith(_NON_HEADER_PREFIXES):
         header_row = next(rows_iter)
 
     assert "&" in header_row
 
     # Get the header: it contains LaTeX formatting, like \textbf{...}
     # Strip \\ and \hline separately, then whitespace
-    header = [
-        t.replace(r"\\", "").replace(r"\hline", "").strip()
-        for t in header_row.split("&")
-    ]
+    header = _strip_row(header_row)
     # Remove \textbf{...} and \textit{...}
-    header = [re.sub(r"\\textbf\{(.+?)\}", r"\1", t) for t in header]
-    header = [re.sub(r"\\textit\{(.+?)\}", r"\1", t) for t in header]
+    header = [_TEXTBF_RE.sub(r"\1", t) for t in header]
+    header = [_TEXTIT_RE.sub(r"\1", t) for t in header]
 
     # map the header to the column names
     header = [column_mapping.get(h, h) for h in header]
@@ -466,7 +513,7 @@ def parse_table(raw_latex_table: str) -> DataFrame:
     # Check if any of the header entries still contain LaTeX formatting,
     # if so, raise an error
     for t in header:
-        if re.search(r"\\text", t):
+        if _TEXT_RE.search(t):
             raise ValueError(
                 f"Header entry '{t}' still contains LaTeX formatting"
             )
@@ -493,99 +540,82 @@ def parse_table(raw_latex_table: str) -> DataFrame:
     #     representing the askemosw id or 'ns:id' in case it's grounded
     #     directly to a namespace other than askemosw.
 
-    parsed_rows = []
-    for row in rows_iter:
-        # Skip comments
-        if row.strip().startswith("%"):
-            continue
-
-        # Replace \& with 'and'
-        row = row.replace(r"\&", "and")
-
-        # Skip if row does not have correct number of columns
-        columns = [
-            c.replace(r"\\", "").replace(r"\hline", "").strip()
-            for c in row.split("&")
-        ]
-        if len(columns) != len(header):
-            if columns and (columns[0] != r"\hline" or columns[0] != r"\\"):
-                print("Skipping row. Incorrect number of columns: ", columns)
-                print("Original row:", row)
-
-            continue
-
-        # Skip if askemosw id contains "?" or "\hl{" (highlighted)
-        if "?" in columns[6] or r"\hl{" in columns[6]:
-            continue
-
-        # Add 'askemosw:' to the askemosw id column if it only contains
-        # digits 0000001 -> askemosw:0000001 OR if digits separated by a
-        # comma and/or slash
-        # 0000001,0000002 -> askemosw:0000001,askemosw:0000002
-        # 0000001/0000002 -> askemosw:0000001/askemosw:0000002
-        # 0000001,0000002/0000003 ->
-        # askemosw:0000001,askemosw:0000002/askemosw:0000003
-        def _get_id(c):
-            if "," in c:
-                return ",".join(_get_id(cc) for cc in c.split(","))
-            elif "/" in c:
-                return "/".join(_get_id(cc) for cc in c.split("/"))
-            elif c.isdigit():
-                return f"askemosw:{c}"
+    def _iter_parsed_rows():
+        for row in rows_iter:
+            # Skip comments
+            if row.strip().startswith("%"):
+                continue
+
+            # Replace \& with 'and'
+            row = row.replace(r"\&", "and")
+
+            # Skip if row does not have correct number of columns
+            columns = _strip_row(row)
+            if len(columns) != len(header):
+                if columns and (
+                    columns[0] != r"\hline" or columns[0] != r"\\"
+                ):
+                    print(
+                        "Skipping row. Incorrect number of columns: ", columns
+                    )
+                    print("Original row:", row)
+
+                continue
+
+            # Skip if askemosw id contains "?" or "\hl{" (highlighted)
+            if "?" in columns[6] or r"\hl{" in columns[6]:
+                continue
+
+            columns[6] = _get_askemosw_id(columns[6])
+
+            # Get the equation number for the Ref. column (column 6)
+            # Find the number in "eqN" or "sami_eqN"
+            eq_num = _EQ_RE.search(columns[5])
+            if eq_num:
+                eq_num = int(eq_num.group(1))
+            else:
+                eq_num = None
+            columns[5] = eq_num
+
+            # Check if the SI-units column (column 5) contains a bunch of
+            # question marks (meaning there is a unit but it's not clear what
+            # it is) '-' means it's unit-less
+            # Extend the unit columns to include:
+            #   - The LaTeX math for the units (original column)
+            #   - The SI-units in sympy format (e.g. kg*m**2/s**2)
+            #   - The dimensions in sympy format (e.g.
+            #     mass*length**2/time**2) - this is currently what comes out
+            #     of parse_sympy_units
+            #   - The SI-units in mathml format
+            #   - The dimensions in mathml format
+
+            latex_si_units = columns[4]
+            if "?" in latex_si_units or latex_si_units is None:
+                latex_si_units = None
+                sympy_dimensions = None
+                si_sympy = None
+                si_mathml = None
+                dim_mathml = None
             else:
-                return c
+                # Parse the units
+                sympy_dimensions, si_sympy, si_mathml, dim_mathml = \
+                    _convert_si_units(latex_si_units)
 
-        columns[6] = _get_id(columns[6])
+            columns[4] = latex_si_units
+            columns += [sympy_dimensions, si_sympy, si_mathml, dim_mathml]
 
-        # Get the equation number for the Ref. column (column 6)
-        # Find the number in "eqN" or "sami_eqN"
-        eq_num = re.search(r"eq(\d+)", columns[5])
-        if eq_num:
-            eq_num = int(eq_num.group(1))
-        else:
-            eq_num = None
-        columns[5] = eq_num
-
-        # Check if the SI-units column (column 5) contains a bunch of question
-        # marks (meaning there is a unit but it's not clear what it is)
-        # '-' means it's unit-less
-        # Extend the unit columns to include:
-        #   - The LaTeX math for the units (original column)
-        #   - The SI-units in sympy format (e.g. kg*m**2/s**2)
-        #   - The dimensions in sympy format (e.g. mass*length**2/time**2) -
-        #     this is currently what comes out of parse_sympy_units
-        #   - The SI-units in mathml format
-        #   - The dimensions in mathml format
-
-        latex_si_units = columns[4]
-        if "?" in latex_si_units or latex_si_units is None:
-            latex_si_units = None
-            sympy_dimensions = None
-            si_sympy = None
-            si_mathml = None
-            dim_mathml = None
-        else:
-            # Parse the units
-            units_exps = get_unit_names_exponents(latex_si_units)
-            sympy_dimensions = unit_exponents_to_sympy_dim(units_exps)
-            dim_mathml = unit_exponents_to_mathml_dim(units_exps)
-            si_sympy = unit_exponents_to_sympy_si(units_exps)
-            si_mathml = unit_exponents_to_mathml_si(units_exps)
-
-        columns[4] = latex_si_units
-        columns += [sympy_dimensions, si_sympy, si_mathml, dim_mathml]
-
-        parsed_rows.append(columns)
-
-    header += [
-        DIMENSION_COLUMN,
-        SI_SYMPY_COLUMN,
-        SI_MATHML_COLUMN,
-        DIM_MATHML_COLUMN,
-    ]
+            yield columns
 
-    # Create the DataFrame
-    df = DataFrame(parsed_rows, columns=header)
+    # Create the DataFrame, streaming the rows in as they are parsed
+    df = DataFrame.from_records(
+        _iter_parsed_rows(),
+        columns=header + [
+            DIMENSION_COLUMN,
+            SI_SYMPY_COLUMN,
+            SI_MATHML_COLUMN,
+            DIM_MATHML_COLUMN,
+        ],
+    )
     return df
 
 
@@ -595,19 +625,17 @@ def parse_latex_tables(latex_file_path: str) -> List[DataFrame]:
     with open(latex_file_path, "r") as fh:
         raw_latex = fh.read()
 
-    # Find all tables (also match 'longtable')
-    table_tables = re.findall(
-        r"\\begin{table}(.+?)\\end{table}", raw_latex, re.DOTALL
+    # Find all tables (also match 'longtable') in a single pass. The
+    # 'table' environments are still parsed before the 'longtable' ones.
+    matches = sorted(
+        _TABLE_RE.finditer(raw_latex),
+        key=lambda match: match.group(1) != "table",
     )
-    long_tables = re.findall(
-        r"\\begin{longtable}(.+?)\\end{longtable}", raw_latex, re.DOTALL
-    )
-    tables = table_tables + long_tables
 
     # Parse each table
     dfs = []
-    for table in tables:
-        dfs.append(parse_table(table))
+    for match in matches:
+        dfs.append(parse_table(match.group(2)))
 
     return dfs
 
@@ -678,7 +706,7 @@ def get_document_version_date(
     """Finds the version string from the main.tex file."""
     # Find the version string: v<Major>.<minor> (MM/DD/YYYY)
     # and extract version and date
-    version_date = re.search(r"v(\d+\.\d+) \((\d+/\d+/\d+)\)", raw_latex)
+    version_date = _VERSION_DATE_RE.search(raw_latex)
     if version_date:
         vers = version_date.group(1)
         dt = version_date.group(2)
@@ -718,6 +746,11 @@ def get_all_symbols(df_list) -> DataFrame:
 
 
 if __name__ == "__main__":
+    # The plotting libraries are only needed for the Venn diagrams made
+    # here, so importing the module for parsing doesn't load them
+    from matplotlib import pyplot as plt
+    from matplotlib_venn import venn3
+
     if len(sys.argv) > 1:
         base_path = sys.argv[1]
     else:
@@ -8,6 +8,8 @@ import copy
 import re
 import typing as t
 import logging
+from collections import defaultdict
+from functools import lru_cache
 from more_itertools import chunked
 
 import networkx as nx
@@ -42,6 +44,58 @@ UNITS_MAPPING = {
     sympy.Symbol("Days"): sympy.Symbol("day"),
 }
 SYMPY_FLOW_RATE_PLACEHOLDER = safe_parse_expr("xxplaceholderxx")
+#: Matches text made up of decimal digits, decimal points, dashes and spaces,
+#: with at least one digit, i.e., an evaluated numerical parameter value
+NUMERICAL_VALUE_PATTERN = re.compile(r"[. -]*\d[\d. -]*")
+#: Matches whitespace between operands and operators, and between
+#: parentheses and operators or operands
+OPERATOR_WHITESPACE_PATTERN = re.compile(
+    r"(?<=[^\w\s])\s+(?=[^\w\s])|(?<=[^\w\s])\s+(?=\w)|(?<=\w)\s+(?=[^\w\s])"
+)
+#: Character replacements that make expression text sympy parseable
+EXPRESSION_TEXT_TRANSLATION = str.maketrans(
+    {"^": "**", " ": "_", "'": None, '"': None, "&": "_"}
+)
+
+
+@lru_cache(maxsize=4096)
+def _parse_expression(
+    expr_text: str, symbol_names: t.Optional[t.FrozenSet[str]] = None
+) -> sympy.Expr:
+    """Parse an expression, reusing the result for repeated expressions.
+
+    System dynamics models often repeat the same small expressions, such as
+    ``0`` or a single variable, so parses are cached on the expression text
+    and the names of the symbols that are in scope.
+
+    Parameters
+    ----------
+    expr_text : str
+        The expression text to parse
+    symbol_names : frozenset[str]
+        The names of the variables to parse as plain symbols
+
+    Returns
+    -------
+    :
+        The parsed sympy expression
+    """
+    local_dict = (
+        {name: sympy.Symbol(name) for name in symbol_names}
+        if symbol_names
+        else None
+    )
+    return safe_parse_expr(expr_text, local_dict)
+
+
+def _to_sympy(
+    expression: t.Union[str, sympy.Expr],
+    symbol_names: t.Optional[t.FrozenSet[str]] = None,
+) -> sympy.Expr:
+    """Return an expression given as preprocessed text or as sympy as sympy."""
+    if isinstance(expression, sympy.Expr):
+        return expression
+    return _parse_expression(expression, symbol_names)
 
 
 def template_model_from_pysd_model(
@@ -58,8 +112,9 @@ def template_model_from_pysd_model(
     ----------
     pysd_model : Model
         The pysd model object
-    expression_map : dict[str,str]
-        Map of variable name to expression
+    expression_map : dict[str,str | sympy.Expr]
+        Map of variable name to expression, either as text or as an
+        already interpreted sympy expression
     grounding_map: dict[str, Concept]
         A grounding map, a map from label to Concept
     initials_map: dict[str, float]
@@ -77,23 +132,23 @@ def template_model_from_pysd_model(
     processed_expression_map = {}
 
     # Mapping of variable name in vensim model to variable python-equivalent name
-    name_to_identifier = dict(model_doc_df[["Real Name", "Py Name"]].values)
-    identifier_to_name = dict(model_doc_df[["Py Name", "Real Name"]].values)
+    identifiers = model_doc_df["Py Name"].tolist()
+    names = model_doc_df["Real Name"].tolist()
+    name_to_identifier = dict(zip(names, identifiers))
+    identifier_to_name = dict(zip(identifiers, names))
 
     # preprocess expression text to make it sympy parseable
     for var_name, var_expression in expression_map.items():
         new_var_name = name_to_identifier[var_name]
+        if isinstance(var_expression, sympy.Expr):
+            processed_expression_map[new_var_name] = var_expression
+            continue
         processed_expression_map[new_var_name] = preprocess_expression_text(
             var_expression
         )
 
-    # Mapping of variable's python name to symbol for expression parsing in sympy
-    symbols = dict(
-        zip(
-            model_doc_df["Py Name"],
-            list(map(lambda x: sympy.Symbol(x), model_doc_df["Py Name"])),
-        )
-    )
+    # The python names of all variables, which are parsed as plain symbols
+    symbol_names = frozenset(identifiers)
 
     # Retrieve the states
     model_states = model_doc_df.loc[
@@ -108,48 +163,34 @@ def template_model_from_pysd_model(
     state_rate_map = {}
 
     # process states and build mapping of state to input rate laws and output rate laws
-    for index, state in model_states.iterrows():
+    # Rows are read as plain dicts to avoid building a Series for every state
+    for state in model_states.to_dict(orient="records"):
         concept_state = state_to_concept(state, grounding_map=grounding_map)
         concepts[concept_state.name] = concept_state
         all_states.add(concept_state.name)
-        symbols[concept_state.name] = sympy.Symbol(concept_state.name)
 
         state_id = state["Py Name"]
         state_rate_map[state_id] = {"input_rates": [], "output_rates": []}
 
-        state_expr_text = processed_expression_map[state_id]
+        state_expr = processed_expression_map[state_id]
 
         # retrieve the expression of inflows and outflows for the state
-        state_arg_sympy = safe_parse_expr(state_expr_text, symbols)
+        state_arg_sympy = _to_sympy(state_expr, symbol_names)
 
         # Create a map of states and whether the flows involved with a state are going in
-        # or out of the state
-        if state_arg_sympy.args:
-            # if it's just the negation of a single symbol
-            if (
-                sympy.core.numbers.NegativeOne() in state_arg_sympy.args
-                and len(state_arg_sympy.args) == 2
-            ):
-                str_symbol = str(state_arg_sympy)
-                state_rate_map[state_id]["output_rates"].append(str_symbol[1:])
+        # or out of the state. A single flow, negated or not, is one term here.
+        for rate_term in sympy.Add.make_args(state_arg_sympy):
+            if rate_term.could_extract_minus_sign():
+                # If the term representing the flow has a negative sign, it is an
+                # outgoing flow, so add it to the outputs without the sign
+                rate_term = -rate_term
+                rate_key = "output_rates"
             else:
-                for rate_free_symbol in state_arg_sympy.args:
-                    str_rate_free_symbol = str(rate_free_symbol)
-                    if "-" in str_rate_free_symbol:
-                        # If the symbol representing the flow has a negative sign, it is an
-                        # outgoing flow
-                        # Add the symbol to outputs symbol without the negative sign
-                        state_rate_map[state_id]["output_rates"].append(
-                            str_rate_free_symbol[1:]
-                        )
-                    else:
-                        # else it is an incoming flow
-                        state_rate_map[state_id]["input_rates"].append(
-                            str_rate_free_symbol
-                        )
-        else:
-            # if it's just a single symbol (i.e. no negation), args property will be empty
-            state_rate_map[state_id]["input_rates"].append(str(state_arg_sympy))
+                # else it is an incoming flow
+                rate_key = "input_rates"
+            state_rate_map[state_id][rate_key].append(
+                rate_term.name if rate_term.is_Symbol else str(rate_term)
+            )
         # get a mapping from flow/stock/etc. name to the related Sympy expression.
         # slightly redundant of the previous block, but this is better encapsulated
     identifier_to_expr = get_identifier_to_expr(
@@ -199,6 +240,12 @@ def template_model_from_pysd_model(
     # Additionally, some auxiliary variables are added as parameters due to inability to parse
     # the auxiliary expression and differentiate it from a parameter
     mira_parameters = {}
+    # Index the model documentation by Python name once so that looking up
+    # a parameter's units and comment doesn't need to scan the whole frame.
+    # Like the filtering this replaces, the first row for a name is used.
+    model_doc_by_identifier = model_doc_df.drop_duplicates(
+        subset="Py Name"
+    ).set_index("Py Name")
     # process parameters
     # No discernible way to identify only parameters in model_doc_df, so go through all variables
     # in the processed expression map
@@ -209,9 +256,9 @@ def template_model_from_pysd_model(
         # constructed parameters in Stella
         # eval_expression returns a sympy object
         try:
-            eval_expression = safe_parse_expr(expression).evalf()
+            eval_expression = _to_sympy(expression).evalf()
         except TypeError:
-            eval_expression = safe_parse_expr("0")
+            eval_expression = _parse_expression("0")
 
         # convert the sympy object to a string
         str_eval_expression = str(eval_expression)
@@ -233,36 +280,32 @@ def template_model_from_pysd_model(
         # then create a parameter
         if str_eval_expression in mira_initials or (
             eval_expression != SYMPY_FLOW_RATE_PLACEHOLDER
-            and str_eval_expression.replace(".", "")
-            .replace(" ", "")
-            .replace("-", "")
-            .isdecimal()
+            and NUMERICAL_VALUE_PATTERN.fullmatch(str_eval_expression)
         ):
             if not is_initial:
                 value = float(str_eval_expression)
-            model_parameter_info = model_doc_df[model_doc_df["Py Name"] == name]
+            parameter_units = model_doc_by_identifier.at[name, "Units"]
+            parameter_comment = model_doc_by_identifier.at[name, "Comment"]
 
             # if units exist
             if (
-                model_parameter_info["Units"].values[0]
-                and model_parameter_info["Units"].values[0] != "dimensionless"
-                and model_parameter_info["Units"].values[0] != "fraction"
+                parameter_units
+                and parameter_units != "dimensionless"
+                and parameter_units != "fraction"
             ):
-                unit_text = (
-                    model_parameter_info["Units"].values[0].replace(" ", "")
-                )
+                unit_text = parameter_units.replace(" ", "")
 
                 parameter = {
                     "id": name,
                     "value": value,
-                    "description": model_parameter_info["Comment"].values[0],
+                    "description": parameter_comment,
                     "units": {"expression": unit_text},
                 }
             else:
                 parameter = {
                     "id": name,
                     "value": value,
-                    "description": model_parameter_info["Comment"].values[0],
+                    "description": parameter_comment,
                 }
 
             mira_parameters[name] = parameter_to_mira(parameter)
@@ -270,10 +313,9 @@ def template_model_from_pysd_model(
             # standardize parameter units if they exist
             if mira_parameters[name].units:
                 param_unit = mira_parameters[name].units
-                for old_unit_symbol, new_unit_symbol in UNITS_MAPPING.items():
-                    param_unit.expression = param_unit.expression.subs(
-                        old_unit_symbol, new_unit_symbol
-                    )
+                param_unit.expression = param_unit.expression.xreplace(
+                    UNITS_MAPPING
+                )
     # construct transitions mapping that determine inputs and outputs states to a rate-law
     transition_map = {}
 
@@ -287,31 +329,32 @@ def template_model_from_pysd_model(
     # template model is of type ControlledConversion for the SIR model; however, using sets,
     # the first type of template is of type NaturalConversion. Would require a lot of rewriting
     # of tests.
-    rates = set()
-    for state_rates in state_rate_map.values():
-        for input_rates in state_rates["input_rates"]:
-            rates.add(input_rates)
-        for output_rates in state_rates["output_rates"]:
-            rates.add(output_rates)
+    # Index the states by the rates that leave and enter them so that each
+    # rate's inputs and outputs can be looked up directly
+    rate_to_input_states = defaultdict(list)
+    rate_to_output_states = defaultdict(list)
+    for state_id, in_out_rate_map in state_rate_map.items():
+        # if a rate is leaving a state, then that state is an input to the rate
+        for output_rate in set(in_out_rate_map["output_rates"]):
+            rate_to_input_states[output_rate].append(state_id)
+        # if a rate is going into a state, then that state is an output to the rate
+        for input_rate in set(in_out_rate_map["input_rates"]):
+            rate_to_output_states[input_rate].append(state_id)
+    rates = rate_to_input_states.keys() | rate_to_output_states.keys()
 
     # create map of transitions
     for rate_name in sorted(rates):
         rate_expr = identifier_to_expr[rate_name]
-        inputs, outputs, controllers = [], [], []
-        for state_id, in_out_rate_map in state_rate_map.items():
-            if (
-                sympy.Symbol(state_id) in rate_expr.free_symbols
-                and rate_name not in in_out_rate_map["output_rates"]
-            ):
-                controllers.append(state_id)
-
-            # if a rate is leaving a state, then that state is an input to the rate
-            if rate_name in in_out_rate_map["output_rates"]:
-                inputs.append(state_id)
-
-            # if a rate is going into a state, then that state is an output to the rate
-            if rate_name in in_out_rate_map["input_rates"]:
-                outputs.append(state_id)
+        # the names of the variables in the rate law, so that stocks can be
+        # checked against it by their identifiers
+        rate_free_names = {symbol.name for symbol in rate_expr.free_symbols}
+        inputs = rate_to_input_states.get(rate_name, [])
+        outputs = rate_to_output_states.get(rate_name, [])
+        controllers = [
+            state_id
+            for state_id in state_rate_map
+            if state_id in rate_free_names and state_id not in inputs
+        ]
 
         transition_map[rate_name] = {
             "name": rate_name,
@@ -326,18 +369,21 @@ def template_model_from_pysd_model(
     for template_id, (transition_name, transition) in enumerate(
         transition_map.items(), start=1
     ):
+        # Templates copy the concepts they are given during validation, and
+        # neither they nor transition_to_templates modify them, so the
+        # concepts are passed in without making a deep copy of each first
         templates_.extend(
             transition_to_templates(
                 input_concepts=[
-                    concepts[input_name].copy(deep=True)
+                    concepts[input_name]
                     for input_name in transition.get("inputs")
                 ],
                 output_concepts=[
-                    concepts[output_name].copy(deep=True)
+                    concepts[output_name]
                     for output_name in transition.get("outputs")
                 ],
                 controller_concepts=[
-                    concepts[controller_name].copy(deep=True)
+                    concepts[controller_name]
                     for controller_name in transition.get("controllers")
                 ],
                 transition_rate=(
@@ -365,8 +411,8 @@ def state_to_concept(state, grounding_map=None) -> Concept:
 
     Parameters
     ----------
-    state : pd.Series
-        The series that contains state data
+    state : dict[str, Any] | pd.Series
+        The row of the model documentation that contains state data
     grounding_map: dict[str, Concept]
         A grounding map, a map from label to Concept
 
@@ -418,25 +464,15 @@ def preprocess_expression_text(expr_text):
 
     # This regex removes spaces between operands and operators. Also removes spaces between
     # parenthesis and operators or operands. Works for symbols as well.
-    expr_text = re.sub(
-        r"(?<=[^\w\s])\s+(?=[^\w\s])|(?<=[^\w\s])\s+(?=\w)|(?<=\w)\s+(?=[^\w\s])",
-        "",
-        expr_text,
-    )
+    expr_text = OPERATOR_WHITESPACE_PATTERN.sub("", expr_text)
 
-    # TODO: Use regular expressions for all text preprocessing rather than using string replace
     # strip leading and trailing white spaces
+    # replace ^ with **
     # replace space between two words that makeup a variable name with "_"'
-    # replace single and doubel quotation marks
-    # replace ampersand & with and
+    # remove single and double quotation marks
+    # replace ampersand & with "_"
     expr_text = (
-        expr_text.strip()
-        .replace("^", "**")
-        .replace(" ", "_")
-        .replace("'", "")
-        .replace('"', "")
-        .replace("&", "_")
-        .lower()
+        expr_text.strip().translate(EXPRESSION_TEXT_TRANSLATION).lower()
     )
     return expr_text
 
@@ -577,26 +613,35 @@ def with_lookup_to_piecewise(expr_text: str) -> str:
 
 
 def get_identifier_to_expr(pysd_model, name_to_expr_str, concepts):
+    # pysd returns a new copy of the documentation frame on each access
+    model_doc_df = pysd_model.doc
+    identifiers = model_doc_df["Py Name"].tolist()
+    # python identifier strings to parse as Sympy symbols
+    identifier_names = frozenset(identifiers)
     # maps from full length string names to python-appropriate identifiers
-    # maps from python identifier strings to Sympy symbols
-    identifier_to_symbol = {
-        name: sympy.Symbol(name) for name in pysd_model.doc["Py Name"]
-    }
-    name_to_identifier = dict(pysd_model.doc[["Real Name", "Py Name"]].values)
+    name_to_identifier = dict(zip(model_doc_df["Real Name"], identifiers))
+    # maps from python identifiers to their pysd variable type, taking
+    # the first row for an identifier that is listed more than once
+    identifier_to_type = {}
+    for identifier, variable_type in zip(identifiers, model_doc_df["Type"]):
+        identifier_to_type.setdefault(identifier, variable_type)
     # get a subset of states representing flows (i.e., excluding stocks).
     aux_state_identifiers = {
-        name
-        for name in pysd_model.doc.loc[(pysd_model.doc["Type"] == "Auxiliary")][
-            "Py Name"
-        ]
+        identifier
+        for identifier, variable_type in identifier_to_type.items()
+        if variable_type == "Auxiliary"
     }
     # maps sympy symbols for expressions to parsed sympy expressions
     id_to_expr = {}
     for real_name, expr_str in name_to_expr_str.items():
+        # expressions that were already interpreted don't need parsing
+        if isinstance(expr_str, sympy.Expr):
+            id_to_expr[name_to_identifier[real_name]] = expr_str
+            continue
         processed_expression_str = preprocess_expression_text(expr_str)
         try:
-            expr = safe_parse_expr(
-                processed_expression_str, identifier_to_symbol
+            expr = _parse_expression(
+                processed_expression_str, identifier_names
             )
         except TypeError as e:
             # This is a Stella issue as some expressions aren't created properly for rates
@@ -628,13 +673,12 @@ def get_identifier_to_expr(pysd_model, name_to_expr_str, concepts):
     )
 
     new_id_to_expr = id_to_expr.copy()
+    expression_symbols = {sympy.Symbol(s) for s in id_to_expr}
     for identifier in identifier_ordering:
         expr = id_to_expr[identifier]
 
         # get a set of strings for all symbols that represent flows
-        symbols = set(expr.free_symbols).intersection(
-            sympy.Symbol(s) for s in id_to_expr
-        )
+        symbols = expr.free_symbols & expression_symbols
         # for each symbol representing a flow, substitute. because we're
         # traversing in reverse topological order, the new value will always
         # have only stocks in it, since it also was already substituted
@@ -642,10 +686,7 @@ def get_identifier_to_expr(pysd_model, name_to_expr_str, concepts):
         # don't substitute parameter values and stocks
         for symbol in symbols:
             if (
-                pysd_model.doc.loc[pysd_model.doc["Py Name"] == str(symbol)][
-                    "Type"
-                ].values[0]
-                == "Constant"
+                identifier_to_type[str(symbol)] == "Constant"
                 or str(symbol) in concepts
             ):
                 continue
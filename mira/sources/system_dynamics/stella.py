@@ -20,10 +20,13 @@ __all__ = [
     "template_model_stella_model_string",
 ]
 
+import operator
 import tempfile
 import re
+import typing as t
 
 import pysd
+from pysd.builders.python.python_model_builder import ModelBuilder
 from pysd.translators.xmile.xmile_file import XmileFile
 from pysd.translators.xmile.xmile_element import (
     ControlElement,
@@ -37,13 +40,39 @@ from pysd.translators.structures.abstract_expressions import (
     InlineLookupsStructure,
 )
 import requests
+import sympy
 
 from mira.metamodel import TemplateModel
 from mira.sources.system_dynamics.pysd import (
     template_model_from_pysd_model,
+    preprocess_expression_text,
 )
 
 XML_PLACEHOLDER_EQN = "<eqn>0</eqn>"
+#: Matches the equation tags of variables in a Stella model
+EQN_TAG_PATTERN = re.compile(r"<eqn>.*?</eqn>", re.DOTALL)
+#: Equations containing all the words of any of these groups can't be parsed
+#: by PySD and are replaced by a placeholder
+UNSUPPORTED_EQN_WORD_GROUPS = [
+    ("if", "then", "else"),
+    ("int", "mod", "(", ")"),
+    ("ln", "(", ")"),
+    ("sum",),
+    ("//",),
+    (",",),
+    ("init",),
+    ("nan",),
+    ("pi",),
+]
+#: The arithmetic operators of Stella expressions and the functions applying
+#: them to sympy expressions
+SYMPY_BINARY_OPERATORS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "^": operator.pow,
+}
 
 
 def template_model_from_stella_model_file(fname) -> TemplateModel:
@@ -104,11 +133,18 @@ def template_model_stella_model_string(xml_str) -> TemplateModel:
     with temp_file as file:
         file.write(xml_str)
 
-    pysd_model = pysd.read_xmile(temp_file.name)
     stella_model_file = XmileFile(temp_file.name)
     stella_model_file.parse()
     expression_map = extract_stella_variable_expressions(stella_model_file)
 
+    # Build and load the pysd model from the file parsed above, the same way
+    # pysd.read_xmile does, rather than having pysd parse it a second time
+    py_model_file = ModelBuilder(
+        stella_model_file.get_abstract_model()
+    ).build_model()
+    pysd_model = pysd.load(py_model_file)
+    pysd_model.xmile_file = temp_file.name
+
     return template_model_from_pysd_model(pysd_model, expression_map)
 
 
@@ -122,11 +158,11 @@ def extract_stella_variable_expressions(stella_model_file):
 
     Returns
     -------
-    : dict[str,str]
-        Mapping of variable name to string variable expression
+    : dict[str,str | sympy.Expr]
+        Mapping of variable name to variable expression, given as a sympy
+        expression where it only uses references, numbers and arithmetic
     """
     expression_map = {}
-    operand_operator_per_level_var_map = {}
 
     for component in stella_model_file.sections[0].components:
         if isinstance(component, ControlElement):
@@ -138,19 +174,13 @@ def extract_stella_variable_expressions(stella_model_file):
             if not hasattr(component.components[0][1], "arguments"):
                 expression_map[component.name] = str(component.components[0][1])
                 continue
-            operands = component.components[0][1].arguments
             # If the flow doesn't use operands (e.g. +,-) but actual functions (e.g. max,pulse)
             # assign the flow as None
             if not hasattr(component.components[0][1], "operators"):
                 expression_map[component.name] = "xxplaceholderxx"
                 continue
-            operators = component.components[0][1].operators
-            operand_operator_per_level_var_map[component.name] = {}
-            extract_variables(
-                operands,
-                operators,
-                component.name,
-                operand_operator_per_level_var_map,
+            expression_map[component.name] = structure_to_expression(
+                component.components[0][1]
             )
         elif isinstance(component, Aux):
             # TODO: test for call structure object
@@ -165,169 +195,152 @@ def extract_stella_variable_expressions(stella_model_file):
                     continue
                 expression_map[component.name] = parse_aux_structure(component)
                 continue
-            operands = component.components[0][1].arguments
-            operators = component.components[0][1].operators
-            operand_operator_per_level_var_map[component.name] = {}
-            extract_variables(
-                operands,
-                operators,
-                component.name,
-                operand_operator_per_level_var_map,
+            expression_map[component.name] = structure_to_expression(
+                component.components[0][1]
             )
 
         elif isinstance(component, Stock):
-            try:
-                operand_operator_per_level_var_map[component.name] = {}
-                operands = component.components[0][1].flow.arguments
-                operators = component.components[0][1].flow.operators
-                extract_variables(
-                    operands,
-                    operators,
-                    component.name,
-                    operand_operator_per_level_var_map,
-                )
-            # If the stock only has a reference and no operators in its expression
-            except AttributeError:
-                stock_flow = component.components[0][1].flow
-                if hasattr(stock_flow, "reference"):
-                    expression_map[component.name] = replace_backslash(
-                        stock_flow.reference
-                    )
-                else:
-                    expression_map[component.name] = stock_flow
-
-                operand_operator_per_level_var_map[component.name] = {}
-                operand_operator_per_level_var_map[component.name][0] = {}
-                operand_operator_per_level_var_map[component.name][0][
-                    "operands"
-                ] = (
-                    [replace_backslash(stock_flow.reference)]
-                    if hasattr(stock_flow, "reference")
-                    else [stock_flow]
-                )
-
-    # construct the expression for each variable once its operators and operands are mapped
-    for var_name, expr_level_dict in operand_operator_per_level_var_map.items():
-        expression_map[var_name] = create_expression(expr_level_dict)
+            # The flow of a stock is either an arithmetic expression, a single
+            # reference or a primitive value
+            expression_map[component.name] = structure_to_expression(
+                component.components[0][1].flow
+            )
+
     return expression_map
 
 
-def create_expression(expr_level_dict):
-    """When a variable's operators and operands are mapped, construct the string expression
+def structure_to_expression(structure):
+    """Return the expression represented by an expression structure
 
     Parameters
     ----------
-    expr_level_dict : dict[int,Any]
-        The mapping of level to operands and operators present in a level of an expression
+    structure : ArithmeticStructure or ReferenceStructure or Any
+        The structure representing an expression, or a primitive value
+
     Returns
     -------
-    : str
-        The string expression
+    : sympy.Expr | str
+        The sympy expression if the structure can be interpreted
+        symbolically, otherwise the string expression
     """
-    str_expression = ""
-    for level, ops in reversed(expr_level_dict.items()):
-        operands = ops["operands"]
-        operators = ops["operators"] if ops.get("operators") else []
-        if not operators:
-            level_expr = operands[0]
-            str_expression += str(level_expr)
-            continue
-        elif len(operands) > len(operators):
-            level_expr = "("
-            for idx, operand in enumerate(operands):
-                try:
-                    if operators[idx] != "negative":
-                        if level == len(expr_level_dict) - 1:
-                            level_expr += operand + operators[idx]
-                        else:
-                            level_expr += operators[idx] + operand
-                    else:
-                        level_expr += "-" + operand
-                except IndexError:
-                    level_expr += operands[len(operands) - 1]
-            str_expression += level_expr + ")"
-        elif len(operands) == len(operators):
-            level_expr = ""
-            for idx, operand in enumerate(operands):
-                if operators[idx] != "negative":
-                    if level == len(expr_level_dict) - 1:
-                        level_expr = operand + operators[idx]
-                    else:
-                        level_expr = operators[idx] + operand
-                else:
-                    level_expr += "-" + operand
-                str_expression += level_expr
-    return str_expression
-
-
-def extract_variables(
-    operands, operators, name, operand_operator_per_level_var_map
-):
-    """Helper method to construct an expression for each variable in a Stella model
+    expression = create_sympy_expression(structure)
+    if expression is None:
+        return create_expression(structure)
+    return expression
+
+
+def create_sympy_expression(structure) -> t.Optional[sympy.Expr]:
+    """Construct the sympy expression represented by an expression structure
 
     Parameters
     ----------
-    operands : list[ReferenceStructure,ArithmeticStructure]
-        List of ReferenceStructure objects representing operands in an expression for a variable
-    operators : list[str]
-        List of operators in an expression for a variable
-    name : str
-        Name of the variable
-    operand_operator_per_level_var_map : dict[str,Any]
-        Mapping of variable name to operators and operands associated with the level they are
-        encountered
+    structure : ArithmeticStructure or ReferenceStructure or Any
+        The structure representing an expression, or a primitive value
 
+    Returns
+    -------
+    :
+        The sympy expression, or None if the structure contains anything
+        other than references, numbers and arithmetic operators
     """
-    operand_operator_per_level_var_map[name][0] = {}
-    operand_operator_per_level_var_map[name][0]["operators"] = []
-    operand_operator_per_level_var_map[name][0]["operands"] = []
-    operand_operator_per_level_var_map[name][0]["operators"].extend(operators)
-    for idx, operand in enumerate(operands):
-        parse_structures(operand, 0, name, operand_operator_per_level_var_map)
-
-
-def parse_structures(operand, idx, name, operand_operator_per_level_var_map):
-    """Recursive helper method that retrieves each operand associated with a ReferenceStructure
-    object and operators associated with an ArithmeticStructure object. ArithmeticStructures can
-    contain ArithmeticStructure or ReferenceStructure Objects.
+    if isinstance(structure, ReferenceStructure):
+        return sympy.Symbol(
+            preprocess_expression_text(replace_backslash(structure.reference))
+        )
+    elif isinstance(structure, ArithmeticStructure):
+        arguments = [
+            create_sympy_expression(argument)
+            for argument in structure.arguments
+        ]
+        if any(argument is None for argument in arguments):
+            return None
+        if len(arguments) == 1:
+            # the only unary operator that can be interpreted is a negation
+            if structure.operators != ["negative"]:
+                return None
+            return -arguments[0]
+        if any(
+            operator_str not in SYMPY_BINARY_OPERATORS
+            for operator_str in structure.operators
+        ):
+            return None
+        # Exponentiation is right-associative, so runs of "^" are combined
+        # from the right first, e.g., a^b^c is a^(b^c) as in the Python code
+        # pysd generates. The remaining operators are left-associative.
+        terms = [arguments[-1]]
+        operators = []
+        for operator_str, argument in zip(
+            reversed(structure.operators), reversed(arguments[:-1])
+        ):
+            if operator_str == "^":
+                terms[-1] = argument ** terms[-1]
+            else:
+                operators.append(operator_str)
+                terms.append(argument)
+        terms.reverse()
+        operators.reverse()
+        expression = terms[0]
+        for operator_str, term in zip(operators, terms[1:]):
+            expression = SYMPY_BINARY_OPERATORS[operator_str](expression, term)
+        return expression
+    # bool is a subclass of int but isn't an arithmetic value here
+    elif isinstance(structure, int) and not isinstance(structure, bool):
+        return sympy.Integer(structure)
+    elif isinstance(structure, float):
+        # match the precision the value would get when parsed from text
+        return sympy.Float(str(structure))
+    return None
+
+
+def create_expression(structure):
+    """Construct the string expression represented by an expression structure
+
+    The structure is traversed with an explicit stack and the resulting
+    tokens are joined once at the end. Nested arithmetic structures are
+    wrapped in parentheses so that the expression keeps their grouping.
 
     Parameters
     ----------
-    operand : ReferenceStructure or ArithmeticStructure
-        The operand in an expression
-    idx : int
-        The level at which the operand is encountered in an expression (e.g. 5+(7-3). The
-        operands 7 and 3 are considered as level 1 and 5 is considered as level 5).
-    name : str
-        The name of the variable
-    operand_operator_per_level_var_map : dict[str,Any]
-        Mapping of variable name to operators and operands associated with the level they are
-        encountered
-    """
-    if operand_operator_per_level_var_map[name].get(idx) is None:
-        operand_operator_per_level_var_map[name][idx] = {}
-        operand_operator_per_level_var_map[name][idx]["operators"] = []
-        operand_operator_per_level_var_map[name][idx]["operands"] = []
-
-    # base case
-    if isinstance(operand, ReferenceStructure):
-        operand_operator_per_level_var_map[name][idx]["operands"].append(
-            replace_backslash(operand.reference)
-        )
-    elif isinstance(operand, ArithmeticStructure):
-        for struct in operand.arguments:
-            parse_structures(
-                struct, idx + 1, name, operand_operator_per_level_var_map
-            )
-        operand_operator_per_level_var_map[name][idx + 1]["operators"].extend(
-            operand.operators
-        )
+    structure : ArithmeticStructure or ReferenceStructure or Any
+        The structure representing an expression, or a primitive value
 
-    # case where operand is just a primitive
-    else:
-        operand_operator_per_level_var_map[name][idx]["operands"].append(
-            str(operand)
-        )
+    Returns
+    -------
+    : str
+        The string expression
+    """
+    tokens = []
+    # Each entry is either a structure to expand or a token string to emit,
+    # distinguished by the boolean flag
+    stack = [(False, structure)]
+    while stack:
+        is_token, item = stack.pop()
+        if is_token:
+            tokens.append(item)
+        elif isinstance(item, ReferenceStructure):
+            tokens.append(replace_backslash(item.reference))
+        elif isinstance(item, ArithmeticStructure):
+            if len(item.arguments) == 1:
+                # A unary operator such as a negation
+                operator = item.operators[0]
+                parts = [
+                    (True, "-" if operator == "negative" else operator),
+                    (False, item.arguments[0]),
+                ]
+            else:
+                parts = [(False, item.arguments[0])]
+                for operator, argument in zip(
+                    item.operators, item.arguments[1:]
+                ):
+                    parts.append((True, operator))
+                    parts.append((False, argument))
+            if item is not structure:
+                parts = [(True, "("), *parts, (True, ")")]
+            stack.extend(reversed(parts))
+        # case where the structure is just a primitive
+        else:
+            tokens.append(str(item))
+    return "".join(tokens)
 
 
 def parse_aux_structure(structure):
@@ -340,18 +353,19 @@ def parse_aux_structure(structure):
         The Aux object
     Returns
     -------
-
+    : str
+        The primitive value, or the string form of the innermost structure
+        if it can't be deconstructed any further
     """
     val = structure.components[0][1]
-    while (
-        not isinstance(val, float)
-        and not isinstance(val, str)
-        and not isinstance(val, int)
-    ):
+    while not isinstance(val, (float, str, int)):
         if hasattr(val, "argument"):
             val = val.argument
-        if isinstance(val, ReferenceStructure):
+        elif isinstance(val, ReferenceStructure):
             val = replace_backslash(val.reference)
+        else:
+            # nothing left to unwrap, e.g., for an unsupported structure
+            break
     return str(val)
 
 
@@ -372,26 +386,9 @@ def process_string(xml_str):
     """
     xml_str = xml_str.replace("\n", "")
 
-    eqn_tags = re.findall(r"<eqn>.*?</eqn>", xml_str, re.DOTALL)
-    for tag in eqn_tags:
-        if all(word in tag.lower() for word in ["if", "then", "else"]):
-            xml_str = xml_str.replace(tag, XML_PLACEHOLDER_EQN)
-        if all(word in tag.lower() for word in ["int", "mod", "(", ")"]):
-            xml_str = xml_str.replace(tag, XML_PLACEHOLDER_EQN)
-        if all(word in tag.lower() for word in ["ln", "(", ")"]):
-            xml_str = xml_str.replace(tag, XML_PLACEHOLDER_EQN)
-        if "sum" in tag.lower():
-            xml_str = xml_str.replace(tag, XML_PLACEHOLDER_EQN)
-        if "//" in tag.lower():
-            xml_str = xml_str.replace(tag, XML_PLACEHOLDER_EQN)
-        if "," in tag.lower():
-            xml_str = xml_str.replace(tag, XML_PLACEHOLDER_EQN)
-        if "init" in tag.lower():
-            xml_str = xml_str.replace(tag, XML_PLACEHOLDER_EQN)
-        if "nan" in tag.lower():
-            xml_str = xml_str.replace(tag, XML_PLACEHOLDER_EQN)
-        if "pi" in tag.lower():
-            xml_str = xml_str.replace(tag, XML_PLACEHOLDER_EQN)
+    # Each equation is checked once as it is matched rather than replacing
+    # every unsupported equation in the whole string one at a time
+    xml_str = EQN_TAG_PATTERN.sub(_replace_unsupported_eqn, xml_str)
 
     # Comment preprocessing
     eqn_bracket_pattern = r"(<eqn>.*?)\{[^}]*\}(.*?</eqn>)"
@@ -401,6 +398,19 @@ def process_string(xml_str):
     return xml_str
 
 
+def _replace_unsupported_eqn(match):
+    """Return the placeholder equation if the matched equation is not supported
+    by PySD, otherwise return it unchanged."""
+    tag = match.group(0)
+    tag_lower = tag.lower()
+    if any(
+        all(word in tag_lower for word in words)
+        for words in UNSUPPORTED_EQN_WORD_GROUPS
+    ):
+        return XML_PLACEHOLDER_EQN
+    return tag
+
+
 def replace_backslash(name):
     """Helper method to remove backslashes from variable names
 
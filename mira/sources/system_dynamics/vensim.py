@@ -34,6 +34,11 @@ SKETCH_DELIMETER = (
 UTF_ENCODING = "{UTF-8} "
 
 CONTROL_VARIABLES = {"SAVEPER", "FINAL TIME", "INITIAL TIME", "TIME STEP"}
+#: The number of bytes of a downloaded model to write at a time
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+#: Matches the arguments of an INTEG call, capturing the expression for the
+#: stock and its initial value
+INTEG_ARGUMENTS_PATTERN = re.compile(r"\(([^,]+),\s*(.*)?\)")
 
 
 def template_model_from_mdl_file(
@@ -97,13 +102,13 @@ def template_model_from_mdl_url(
     :
         A MIRA Template Model
     """
-    data = requests.get(url).content
-    temp_file = tempfile.NamedTemporaryFile(
+    # Write the response to the file as it arrives rather than holding the
+    # whole model in memory first
+    with requests.get(url, stream=True) as res, tempfile.NamedTemporaryFile(
         mode="w+b", suffix=".mdl", delete=False
-    )
-
-    with temp_file as file:
-        file.write(data)
+    ) as temp_file:
+        for chunk in res.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            temp_file.write(chunk)
 
     return template_model_from_mdl_file(
         temp_file.name,
@@ -134,6 +139,10 @@ def extract_vensim_variable_expressions(
     expression_map = {}
     initial_values = {}
 
+    # the model text usually starts with its encoding type
+    if model_text.startswith(UTF_ENCODING):
+        model_text = model_text[len(UTF_ENCODING):]
+
     # Model text is a single string that represents the entire contents of the Vensim model.
     # We split model text into a list with elements delimited by "|"
     # variable declaration in vensim files are delimited by the "|" character
@@ -148,25 +157,21 @@ def extract_vensim_variable_expressions(
         if NEW_CONTROL_DELIMETER in text:
             continue
 
+        # Throw away every text after the "~" and split the remaining text at the first "="
+        # to get variable name and accompanying expression
+        declaration = text.partition("~")[0]
+        var_name_text, eq, expression_text = declaration.partition("=")
+
         # if no variable declaration, continue
-        if "=" not in text:
+        if not eq:
             continue
 
-        # first entry usually has encoding type
-        if UTF_ENCODING in text:
-            text = text.replace(UTF_ENCODING, "")
-
-        # Throw away every text after the "~" and split the remaining text by "=" to get
-        # variable name and accompanying expression
-        var_declaration = text.split("~")[0].split("=")
-        old_var_name = var_declaration[0].strip()
-        text_expression = var_declaration[1].strip()
-
+        old_var_name = var_name_text.strip()
         # account for variables with expressions that have "=" in them besides the
-        # initial "=" character for var declaration, stitch together the expression
-        if len(var_declaration) > 2:
-            for part_expression_text in var_declaration[2:]:
-                text_expression += "=" + part_expression_text
+        # initial "=" character for var declaration, only the text up to the next
+        # "=" is stripped
+        first_part, eq, remainder = expression_text.partition("=")
+        text_expression = first_part.strip() + eq + remainder
 
         # vensim has several builtin functions, like MIN(), MAX(), XIDZ(), INTEG()
         #   we pass these along for sympy to just consider like function calls.
@@ -191,7 +196,7 @@ def extract_vensim_variable_expressions(
         # but the initial value as well. Because when pysd ingests the hackathon Vensim file,
         # it will have 44 initial values for only 19 states.
         if "INTEG" in text_expression:
-            match = re.search(r"\(([^,]+),\s*(.*)?\)", text_expression)
+            match = INTEG_ARGUMENTS_PATTERN.search(text_expression)
             text_expression = match.group(1)
             initial = match.group(2)
 
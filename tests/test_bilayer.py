@@ -1,10 +1,13 @@
+import json
+
 from sympy import Symbol
 from mira.examples.sir import sir_bilayer
 from mira.metamodel import Concept, ControlledConversion, NaturalConversion
 from mira.metamodel.template_model import TemplateModel, Parameter
 from mira.modeling import Model
 from mira.modeling.bilayer import BilayerModel
-from mira.sources.bilayer import template_model_from_bilayer
+from mira.sources.bilayer import template_model_from_bilayer, \
+    template_model_from_bilayer_file
 
 
 def test_process_bilayer():
@@ -22,6 +25,13 @@ def test_process_bilayer():
     assert nc.outcome.name == 'R'
 
 
+def test_process_bilayer_file(tmp_path):
+    path = tmp_path / 'sir_bilayer.json'
+    path.write_text(json.dumps(sir_bilayer))
+    tmodel = template_model_from_bilayer_file(path)
+    assert tmodel == template_model_from_bilayer(sir_bilayer)
+
+
 def test_generate_bilayer():
     S = Concept(name='S')
     I = Concept(name='I')
@@ -4,6 +4,7 @@ from copy import deepcopy as _d
 import json
 import unittest
 from copy import deepcopy
+from functools import lru_cache
 
 import pytest
 import requests
@@ -26,26 +27,39 @@ else:
 SBMLMATH_REQUIRED = unittest.skipUnless(sbmlmath_available, reason="SBMLMath package is not available")
 
 
+@lru_cache(maxsize=1)
+def _generated_schema():
+    """Return the JSON schema generated from the metamodel."""
+    return get_json_schema()
+
+
+@lru_cache(maxsize=1)
+def _on_disk_schema():
+    """Return the JSON schema stored in the repository."""
+    return json.loads(SCHEMA_PATH.read_text())
+
+
 class TestMetaModel(unittest.TestCase):
     """A test case for the metamodel."""
     # Set to None for full diff, remove to have default diff
     # https://docs.python.org/3/library/unittest.html#unittest.TestCase.maxDiff
     maxDiff = None
 
-    def setUp(self) -> None:
-        """Initialize the test case with shared concepts."""
-        self.susceptible = Concept(name="susceptible population", identifiers={"ido": "0000514"})
-        self.exposed = Concept(name="exposed", identifiers={"ido": "0000597"})
-        self.infected = Concept(name="infected population", identifiers={"ido": "0000511"})
-        self.asymptomatic = Concept(name="asymptomatic infected population", identifiers={"ido": "0000511"})
-        self.immune = Concept(name="immune population", identifiers={"ido": "0000592"})
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Initialize the test case with concepts shared by all tests."""
+        cls.susceptible = Concept(name="susceptible population", identifiers={"ido": "0000514"})
+        cls.exposed = Concept(name="exposed", identifiers={"ido": "0000597"})
+        cls.infected = Concept(name="infected population", identifiers={"ido": "0000511"})
+        cls.asymptomatic = Concept(name="asymptomatic infected population", identifiers={"ido": "0000511"})
+        cls.immune = Concept(name="immune population", identifiers={"ido": "0000592"})
 
     def test_schema(self):
         """Test that the schema is up to date."""
         self.assertTrue(SCHEMA_PATH.is_file())
         self.assertEqual(
-            get_json_schema(),
-            json.loads(SCHEMA_PATH.read_text()),
+            _generated_schema(),
+            _on_disk_schema(),
             msg="Regenerate an updated JSON schema by running `python -m mira.metamodel.schema`",
         )
 
@@ -113,6 +127,17 @@ def test_rate_law_to_mathml():
                       '<ci>b1</ci></apply>')
 
 
+def test_rate_law_to_mathml_cached():
+    x = sympy.Symbol('x')
+    assert expression_to_mathml(2 * x) == \
+        '<apply><times/><cn>2</cn><ci>x</ci></apply>'
+    # Equal-valued numbers of different types shouldn't share cache entries
+    assert expression_to_mathml(2.0 * x) == \
+        '<apply><times/><cn>2.0</cn><ci>x</ci></apply>'
+    assert expression_to_mathml(SympyExprStr(2 * x)) == \
+        expression_to_mathml(2 * x)
+
+
 @SBMLMATH_REQUIRED
 def test_mathml_to_sympy():
     # 1
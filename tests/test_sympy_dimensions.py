@@ -1,4 +1,5 @@
 import pandas as pd
+import pytest
 from sympy import mathml
 from sympy.physics.units import (
     mass,
@@ -29,17 +30,25 @@ from mira.sources.space_latex import (
     get_shared_groundings,
 )
 
+#: The SI units and dimension of energy (joules)
+JOULE_SI = kg * m**2 * s**-2
+JOULE_DIMENSION = (mass * length**2 * time**-2).args[0]
+#: The unit exponents of a pressure gradient and its SI units and dimension
+PRESSURE_GRADIENT_UNITS_EXPONENTS = [("m", -2), ("kg", 1), ("s", -2)]
+PRESSURE_GRADIENT_SI = kg * m**-2 * s**-2
+PRESSURE_GRADIENT_DIMENSION = (mass * length**-2 * time**-2).args[0]
 
-def test_base_units():
-    for unit in ["-", "m", "s", "kg", "K", "A", "deg", "rad"]:
-        parsed_name = get_unit_name(unit)
-        parsed_exponent = get_exponent(unit)
-        assert parsed_name == unit
-        assert parsed_exponent == 1
 
-        length_unit_list = get_unit_names_exponents(unit)
-        assert len(length_unit_list) == 1
-        assert length_unit_list[0] == (unit, 1)
+@pytest.mark.parametrize("unit", ["-", "m", "s", "kg", "K", "A", "deg", "rad"])
+def test_base_units(unit):
+    parsed_name = get_unit_name(unit)
+    parsed_exponent = get_exponent(unit)
+    assert parsed_name == unit
+    assert parsed_exponent == 1
+
+    length_unit_list = get_unit_names_exponents(unit)
+    assert len(length_unit_list) == 1
+    assert length_unit_list[0] == (unit, 1)
 
 
 def test_joules():
@@ -50,7 +59,7 @@ def test_joules():
     assert units_exponents_list[1] == ("m", 2)
     assert units_exponents_list[2] == ("s", -2)
 
-    joules_si = kg * m**2 * s**-2
+    joules_si = JOULE_SI
     unit_exp_si = unit_exponents_to_sympy_si(units_exponents_list)
     assert joules_si == unit_exp_si
 
@@ -58,7 +67,7 @@ def test_joules():
     unit_exp_mathml_si = unit_exponents_to_mathml_si(units_exponents_list)
     assert mathml_si == unit_exp_mathml_si
 
-    joules_dim = (mass * length**2 * time**-2).args[0]
+    joules_dim = JOULE_DIMENSION
     unit_exp_dim = unit_exponents_to_sympy_dim(units_exponents_list)
     assert joules_dim == unit_exp_dim
 
@@ -124,36 +133,41 @@ def _get_test_df():
     ).astype(dtype={column_mapping["Ref."]: str})
 
     si_units_col_name = column_mapping["SI-Units"]
+    # Parse each distinct unit string once and map the results onto the rows
+    units_exponents = {
+        latex_units: get_unit_names_exponents(latex_units)
+        for latex_units in df[si_units_col_name].unique()
+    }
     # Add the sympy columns
-    df[DIMENSION_COLUMN] = df[si_units_col_name].apply(
-        lambda x: unit_exponents_to_sympy_dim(get_unit_names_exponents(x))
-    )
-    df[SI_SYMPY_COLUMN] = df[si_units_col_name].apply(
-        lambda x: unit_exponents_to_sympy_si(get_unit_names_exponents(x))
-    )
-    df[SI_MATHML_COLUMN] = df[si_units_col_name].apply(
-        lambda x: unit_exponents_to_mathml_si(get_unit_names_exponents(x))
-    )
-    df[DIM_MATHML_COLUMN] = df[si_units_col_name].apply(
-        lambda x: unit_exponents_to_mathml_dim(get_unit_names_exponents(x))
-    )
+    for column, convert in [
+        (DIMENSION_COLUMN, unit_exponents_to_sympy_dim),
+        (SI_SYMPY_COLUMN, unit_exponents_to_sympy_si),
+        (SI_MATHML_COLUMN, unit_exponents_to_mathml_si),
+        (DIM_MATHML_COLUMN, unit_exponents_to_mathml_dim),
+    ]:
+        converted = {
+            latex_units: convert(unit_exponents)
+            for latex_units, unit_exponents in units_exponents.items()
+        }
+        df[column] = df[si_units_col_name].map(converted)
     return df
 
 
-def test_json_serialization():
+def test_json_serialization(tmp_path):
     df = _get_test_df()
+    path = tmp_path / "test.json"
     document_version = "0.1"
     date_str = "1/1/2020"
 
     # Dump to json
     dump_df_json(
         data_frame=df,
-        path="test.json",
+        path=path,
         document_version=document_version,
         date_str=date_str,
         default_handler=str,
     )
-    loaded_df = load_df_json("test.json")
+    loaded_df = load_df_json(path)
     assert loaded_df is not None
     assert VERSION_KEY in loaded_df.attrs
     assert DATE_KEY in loaded_df.attrs
@@ -167,15 +181,9 @@ def test_json_serialization():
 
     # Test equality for the sympy_dimensions column and si sympy column by
     # comparing the string representations
-    assert (
-        df[DIMENSION_COLUMN]
-        .apply(str)
-        .equals(loaded_df[DIMENSION_COLUMN].apply(str))
-    )
-    assert (
-        df[SI_SYMPY_COLUMN]
-        .apply(str)
-        .equals(loaded_df[SI_SYMPY_COLUMN].apply(str))
+    sympy_columns = [DIMENSION_COLUMN, SI_SYMPY_COLUMN]
+    assert df[sympy_columns].astype(str).equals(
+        loaded_df[sympy_columns].astype(str)
     )
 
 
@@ -210,34 +218,29 @@ def test_getting_unit_exponents_bad_format():
 
 
 def test_unit_exponents_to_sympy_si():
-    units_exponents = [("m", -2), ("kg", 1), ("s", -2)]
-    sympy_si = unit_exponents_to_sympy_si(units_exponents)
-    assert sympy_si == kg * m**-2 * s**-2
+    sympy_si = unit_exponents_to_sympy_si(PRESSURE_GRADIENT_UNITS_EXPONENTS)
+    assert sympy_si == PRESSURE_GRADIENT_SI
 
 
 def test_unit_exponents_to_mathl_si():
-    units_exponents = [("m", -2), ("kg", 1), ("s", -2)]
-    mathml_si = unit_exponents_to_mathml_si(units_exponents)
-    si_units = kg * m**-2 * s**-2
-    assert mathml(si_units) == mathml_si
+    mathml_si = unit_exponents_to_mathml_si(PRESSURE_GRADIENT_UNITS_EXPONENTS)
+    assert mathml(PRESSURE_GRADIENT_SI) == mathml_si
 
 
 def test_unit_exponents_to_sympy_dim():
-    units_exponents = [("m", -2), ("kg", 1), ("s", -2)]
-    sympy_dimensions = unit_exponents_to_sympy_dim(units_exponents)
-    # Check that the str representations are equal
-    assert str(sympy_dimensions) == str(
-        (mass * length**-2 * time**-2).args[0]
+    sympy_dimensions = unit_exponents_to_sympy_dim(
+        PRESSURE_GRADIENT_UNITS_EXPONENTS
     )
+    # Check that the str representations are equal
+    assert str(sympy_dimensions) == str(PRESSURE_GRADIENT_DIMENSION)
 
 
 def test_unit_exponents_to_mathml_dim():
-    units_exponents = [("m", -2), ("kg", 1), ("s", -2)]
-    mathml_dimensions = unit_exponents_to_mathml_dim(units_exponents)
-    # Check that the str representations are equal
-    assert mathml_dimensions == mathml(
-        (mass * length**-2 * time**-2).args[0]
+    mathml_dimensions = unit_exponents_to_mathml_dim(
+        PRESSURE_GRADIENT_UNITS_EXPONENTS
     )
+    # Check that the str representations are equal
+    assert mathml_dimensions == mathml(PRESSURE_GRADIENT_DIMENSION)
 
 
 def test_get_date_version():
@@ -1,16 +1,37 @@
 import requests
+from functools import lru_cache, partial
 from pathlib import Path
 
+import pytest
 import sympy
+from pysd.translators.structures.abstract_expressions import (
+    ArithmeticStructure,
+    ReferenceStructure,
+)
 
 from mira.sources.system_dynamics.pysd import (
     with_lookup_to_piecewise,
     ifthenelse_to_piecewise,
 )
-from mira.sources.system_dynamics.vensim import *
-from mira.sources.system_dynamics.stella import *
+from mira.sources.system_dynamics.vensim import (
+    template_model_from_mdl_file,
+    template_model_from_mdl_url,
+)
+from mira.sources.system_dynamics.stella import (
+    create_expression,
+    create_sympy_expression,
+    template_model_from_stella_model_file,
+    template_model_from_stella_model_url,
+)
 from mira.modeling.amr.stockflow import template_model_to_stockflow_json
-from mira.metamodel import *
+from mira.metamodel import (
+    ControlledConversion,
+    NaturalConversion,
+    NaturalDegradation,
+    NaturalProduction,
+    SympyExprStr,
+    TemplateModel,
+)
 from mira.modeling import Model
 from mira.metamodel.utils import safe_parse_expr
 
@@ -28,69 +49,114 @@ XMILE_RESOURCES_POP_URL = (
     "https://exchange.iseesystems.com/model/isee/resources-and-population"
 )
 
+#: The upstream stock, downstream stock, name and rate expression of each
+#: flow of the SIR model
+SIR_FLOWS = [
+    ("infectious", "recovered", "recovering", "infectious/duration"),
+    (
+        "susceptible",
+        "infectious",
+        "succumbing",
+        "infectious*susceptible*contact_infectivity/total_population",
+    ),
+]
+SIR_STOCKS = ["infectious", "recovered", "susceptible"]
+SIR_PARAMETERS = [
+    ("duration", 5.0),
+    ("contact_infectivity", 0.3),
+    ("total_population", 1000.0),
+]
+SIR_INITIALS = [("infectious", 5.0), ("recovered", 0.0), ("susceptible", 1000.0)]
+#: The expressions expected for the initials of the SIR template model
+SIR_INITIAL_EXPRESSIONS = {
+    target: SympyExprStr(sympy.Float(value)) for target, value in SIR_INITIALS
+}
+
+TEA_FLOWS = [
+    (
+        "teacup_temperature",
+        None,
+        "heat_loss_to_room",
+        "(teacup_temperature - room_temperature)/characteristic_time",
+    ),
+]
+TEA_STOCKS = ["teacup_temperature"]
+TEA_PARAMETERS = [("characteristic_time", 10.0), ("room_temperature", 70.0)]
+TEA_INITIALS = [("teacup_temperature", 180.0)]
+
 HERE = Path(__file__).parent
 MDL_SIR_PATH = HERE / "SIR.mdl"
 XMILE_SIR_PATH = HERE / "SIR.xmile"
+#: The size of the chunks in which test models are downloaded
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def download_to_file(url, path) -> Path:
+    """Stream the contents at a URL into a file and return its path."""
+    with requests.get(url, stream=True) as res:
+        res.raise_for_status()
+        with open(path, "wb") as file:
+            for chunk in res.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                file.write(chunk)
+    return path
+
+
+@lru_cache(maxsize=64)
+def parse_expression(text) -> sympy.Expr:
+    """Return the sympy expression for a string, parsing each string once."""
+    return safe_parse_expr(text)
 
 
+@lru_cache(maxsize=None)
+def get_sir_vensim_template_model() -> TemplateModel:
+    """Return the SIR template model from the Vensim file, parsed once."""
+    return template_model_from_mdl_file(
+        download_to_file(MDL_SIR_URL, MDL_SIR_PATH)
+    )
+
+
+@lru_cache(maxsize=None)
+def get_sir_stella_template_model() -> TemplateModel:
+    """Return the SIR template model from the Stella file, parsed once."""
+    return template_model_from_stella_model_file(
+        download_to_file(XMILE_SIR_URL, XMILE_SIR_PATH)
+    )
+
+
+@pytest.mark.network
+@pytest.mark.xdist_group("network")
 def test_sir_vensim_file():
-    data = requests.get(MDL_SIR_URL).content
-    with open(MDL_SIR_PATH, "wb") as file:
-        file.write(data)
-    tm = template_model_from_mdl_file(MDL_SIR_PATH)
+    tm = get_sir_vensim_template_model()
     sir_tm_test(tm)
 
 
+@pytest.mark.network
+@pytest.mark.xdist_group("network")
 def test_sir_vensim_url():
     tm = template_model_from_mdl_url(MDL_SIR_URL)
     sir_tm_test(tm)
 
 
+@pytest.mark.network
+@pytest.mark.xdist_group("network")
 def test_lotka_vensim_url():
     tm = template_model_from_mdl_url(MDL_LOTKA_URL)
 
 
+@pytest.mark.network
+@pytest.mark.xdist_group("network")
 def test_sir_stella_file():
-    data = requests.get(XMILE_SIR_URL).content
-    with open(XMILE_SIR_PATH, "wb") as file:
-        file.write(data)
-    tm = template_model_from_stella_model_file(XMILE_SIR_PATH)
+    tm = get_sir_stella_template_model()
     sir_tm_test(tm)
 
 
+@pytest.mark.network
+@pytest.mark.xdist_group("network")
 def test_sir_stella_url():
     tm = template_model_from_stella_model_url(XMILE_SIR_URL)
     sir_tm_test(tm)
 
 
-def test_sir_vensim_end_to_end():
-    tm = template_model_from_mdl_url(MDL_SIR_URL)
-    model = Model(tm)
-    amr = template_model_to_stockflow_json(tm)
-    sir_end_to_end_test(model, amr)
-
-
-def test_sir_stella_end_to_end():
-    tm = template_model_from_stella_model_url(XMILE_SIR_URL)
-    model = Model(tm)
-    amr = template_model_to_stockflow_json(tm)
-    sir_end_to_end_test(model, amr)
-
-
-def test_tea_vensim_end_to_end():
-    tm = template_model_from_mdl_url(MDL_TEA_URL)
-    model = Model(tm)
-    amr = template_model_to_stockflow_json(tm)
-    tea_end_to_end_test(model, amr)
-
-
-def test_tea_stella_end_to_end():
-    tm = template_model_from_stella_model_url(XMILE_TEA_URL)
-    model = Model(tm)
-    amr = template_model_to_stockflow_json(tm)
-    tea_end_to_end_test(model, amr)
-
-
 def sir_tm_test(tm):
     assert len(tm.templates) == 2
     assert len(tm.parameters) == 3
@@ -102,11 +168,8 @@ def sir_tm_test(tm):
     assert "susceptible" in tm.initials
     assert "infectious" in tm.initials
     assert "recovered" in tm.initials
-    assert tm.initials["susceptible"].expression == SympyExprStr(
-        sympy.Float(1000)
-    )
-    assert tm.initials["infectious"].expression == SympyExprStr(sympy.Float(5))
-    assert tm.initials["recovered"].expression == SympyExprStr(sympy.Float(0))
+    for target, expression in SIR_INITIAL_EXPRESSIONS.items():
+        assert tm.initials[target].expression == expression
 
     assert "contact_infectivity" in tm.parameters
     assert "duration" in tm.parameters
@@ -127,102 +190,119 @@ def sir_end_to_end_test(model, amr):
     assert len(model.transitions) == 2
     assert len(model.variables) == 3
     assert len(model.parameters) - 1 == 3
-    assert "infectious" in model.variables
-    assert "recovered" in model.variables
-    assert "susceptible" in model.variables
-    assert "duration" in model.parameters
-    assert "contact_infectivity" in model.parameters
-    assert "total_population" in model.parameters
-
-    amr_model = amr["model"]
-    amr_semantics_ode = amr["semantics"]["ode"]
-    assert len(amr_model["flows"]) == 2
-    assert len(amr_model["stocks"]) == 3
-    assert len(amr_model["auxiliaries"]) == 3
-    assert len(amr_model["links"]) == 6
-    assert len(amr_semantics_ode["parameters"]) == 3
-    assert len(amr_semantics_ode["initials"]) == 3
-
-    assert amr_model["flows"][0]["upstream_stock"] == "infectious"
-    assert amr_model["flows"][0]["downstream_stock"] == "recovered"
-    assert amr_model["flows"][0]["name"] == "recovering"
-    assert amr_model["flows"][1]["upstream_stock"] == "susceptible"
-    assert amr_model["flows"][1]["downstream_stock"] == "infectious"
-    assert amr_model["flows"][1]["name"] == "succumbing"
-
-    assert safe_parse_expr(
-        amr_model["flows"][0]["rate_expression"]
-    ) == safe_parse_expr("infectious/duration")
-
-    assert safe_parse_expr(
-        amr_model["flows"][1]["rate_expression"]
-    ) == safe_parse_expr(
-        "infectious*susceptible*contact_infectivity/total_population"
+    amr_end_to_end_test(
+        model,
+        amr,
+        flows=SIR_FLOWS,
+        stocks=SIR_STOCKS,
+        parameters=SIR_PARAMETERS,
+        initials=SIR_INITIALS,
+        num_links=6,
     )
 
-    assert amr_model["stocks"][0]["name"] == "infectious"
-    assert amr_model["stocks"][1]["name"] == "recovered"
-    assert amr_model["stocks"][2]["name"] == "susceptible"
-
-    assert amr_model["auxiliaries"][0]["name"] == "duration"
-    assert amr_model["auxiliaries"][1]["name"] == "contact_infectivity"
-    assert amr_model["auxiliaries"][2]["name"] == "total_population"
-
-    assert amr_semantics_ode["parameters"][0]["id"] == "duration"
-    assert amr_semantics_ode["parameters"][0]["value"] == 5.0
-    assert amr_semantics_ode["parameters"][1]["id"] == "contact_infectivity"
-    assert amr_semantics_ode["parameters"][1]["value"] == 0.3
-    assert amr_semantics_ode["parameters"][2]["id"] == "total_population"
-    assert amr_semantics_ode["parameters"][2]["value"] == 1000.0
-
-    assert amr_semantics_ode["initials"][0]["target"] == "infectious"
-    assert float(amr_semantics_ode["initials"][0]["expression"]) == 5.0
-    assert amr_semantics_ode["initials"][1]["target"] == "recovered"
-    assert float(amr_semantics_ode["initials"][1]["expression"]) == 0.0
-    assert amr_semantics_ode["initials"][2]["target"] == "susceptible"
-    assert float(amr_semantics_ode["initials"][2]["expression"]) == 1000.0
-
 
 def tea_end_to_end_test(model, amr):
     assert len(model.transitions) == 1
     assert len(model.variables) == 1
     assert len(model.parameters) - 1 == 2
-    assert "teacup_temperature" in model.variables
-    assert "characteristic_time" in model.parameters
-    assert "room_temperature" in model.parameters
-
-    amr_model = amr["model"]
-    amr_semantics_ode = amr["semantics"]["ode"]
-    assert len(amr_model["flows"]) == 1
-    assert len(amr_model["stocks"]) == 1
-    assert len(amr_model["auxiliaries"]) == 2
-    assert len(amr_model["links"]) == 3
-    assert len(amr_semantics_ode["parameters"]) == 2
-    assert len(amr_semantics_ode["initials"]) == 1
-
-    assert amr_model["flows"][0]["upstream_stock"] == "teacup_temperature"
-    assert amr_model["flows"][0]["downstream_stock"] is None
-    assert amr_model["flows"][0]["name"] == "heat_loss_to_room"
-
-    assert safe_parse_expr(
-        amr_model["flows"][0]["rate_expression"]
-    ) == safe_parse_expr(
-        "(teacup_temperature - room_temperature)/characteristic_time"
+    amr_end_to_end_test(
+        model,
+        amr,
+        flows=TEA_FLOWS,
+        stocks=TEA_STOCKS,
+        parameters=TEA_PARAMETERS,
+        initials=TEA_INITIALS,
+        num_links=3,
     )
 
-    assert amr_model["stocks"][0]["name"] == "teacup_temperature"
 
-    assert amr_model["auxiliaries"][0]["name"] == "characteristic_time"
-    assert amr_model["auxiliaries"][1]["name"] == "room_temperature"
+def amr_end_to_end_test(
+    model, amr, flows, stocks, parameters, initials, num_links
+):
+    """Check a model and its stock and flow AMR against expectation tables.
+
+    Parameters
+    ----------
+    model : mira.modeling.Model
+        The model built from the template model
+    amr : dict
+        The stock and flow AMR generated from the template model
+    flows : list[tuple[str, str | None, str, str]]
+        The upstream stock, downstream stock, name and rate expression of
+        each expected flow, in order
+    stocks : list[str]
+        The names of the expected stocks, in order
+    parameters : list[tuple[str, float]]
+        The name and value of each expected parameter, in order. These are
+        also the expected auxiliaries.
+    initials : list[tuple[str, float]]
+        The target and value of each expected initial, in order
+    num_links : int
+        The expected number of links
+    """
+    for stock in stocks:
+        assert stock in model.variables
+    for name, _ in parameters:
+        assert name in model.parameters
 
-    assert amr_semantics_ode["parameters"][0]["id"] == "characteristic_time"
-    assert amr_semantics_ode["parameters"][0]["value"] == 10.0
-    assert amr_semantics_ode["parameters"][1]["id"] == "room_temperature"
-    assert amr_semantics_ode["parameters"][1]["value"] == 70.0
-    assert amr_semantics_ode["initials"][0]["target"] == "teacup_temperature"
-    assert float(amr_semantics_ode["initials"][0]["expression"]) == 180.0
+    amr_model = amr["model"]
+    amr_semantics_ode = amr["semantics"]["ode"]
+    assert len(amr_model["flows"]) == len(flows)
+    assert len(amr_model["stocks"]) == len(stocks)
+    assert len(amr_model["auxiliaries"]) == len(parameters)
+    assert len(amr_model["links"]) == num_links
+    assert len(amr_semantics_ode["parameters"]) == len(parameters)
+    assert len(amr_semantics_ode["initials"]) == len(initials)
+
+    for (upstream, downstream, name, rate), flow in zip(
+        flows, amr_model["flows"]
+    ):
+        assert flow["upstream_stock"] == upstream
+        assert flow["downstream_stock"] == downstream
+        assert flow["name"] == name
+        assert parse_expression(flow["rate_expression"]) == parse_expression(
+            rate
+        )
+
+    for name, stock in zip(stocks, amr_model["stocks"]):
+        assert stock["name"] == name
+
+    for (name, value), auxiliary, parameter in zip(
+        parameters, amr_model["auxiliaries"], amr_semantics_ode["parameters"]
+    ):
+        assert auxiliary["name"] == name
+        assert parameter["id"] == name
+        assert parameter["value"] == value
+
+    for (target, value), initial in zip(initials, amr_semantics_ode["initials"]):
+        assert initial["target"] == target
+        assert float(initial["expression"]) == value
+
+
+@pytest.mark.network
+@pytest.mark.xdist_group("network")
+@pytest.mark.parametrize(
+    "get_template_model,end_to_end_test",
+    [
+        (get_sir_vensim_template_model, sir_end_to_end_test),
+        (get_sir_stella_template_model, sir_end_to_end_test),
+        (partial(template_model_from_mdl_url, MDL_TEA_URL), tea_end_to_end_test),
+        (
+            partial(template_model_from_stella_model_url, XMILE_TEA_URL),
+            tea_end_to_end_test,
+        ),
+    ],
+    ids=["sir_vensim", "sir_stella", "tea_vensim", "tea_stella"],
+)
+def test_end_to_end(get_template_model, end_to_end_test):
+    tm = get_template_model()
+    model = Model(tm)
+    amr = template_model_to_stockflow_json(tm)
+    end_to_end_test(model, amr)
 
 
+@pytest.mark.network
+@pytest.mark.xdist_group("network")
 def test_stella_resources_pop_model():
     tm = template_model_from_stella_model_url(XMILE_RESOURCES_POP_URL)
     assert len(tm.initials) == 2
@@ -244,6 +324,8 @@ def test_stella_resources_pop_model():
     assert tm.templates[3].outcome.name == "natural_resources"
 
 
+@pytest.mark.network
+@pytest.mark.xdist_group("network")
 def test_stella_covid19_model():
     tm = template_model_from_stella_model_url(XMILE_COVID_URL)
 
@@ -285,3 +367,104 @@ def test_with_lookup_to_piecewise():
     val = with_lookup_to_piecewise(data)
     rv = safe_parse_expr(val)
     assert isinstance(rv, sympy.Expr)
+
+
+def _reference(name):
+    return ReferenceStructure(reference=name, subscripts=None)
+
+
+def _arithmetic(operators, *arguments):
+    return ArithmeticStructure(operators=operators, arguments=arguments)
+
+
+def test_create_sympy_expression():
+    a, b, c = sympy.symbols("a b c")
+    ra, rb, rc = _reference("a"), _reference("b"), _reference("c")
+
+    # Exponentiation is right-associative: a^b^c is a^(b^c)
+    expr = create_sympy_expression(_arithmetic(["^", "^"], ra, rb, rc))
+    assert expr == a ** (b**c)
+    assert expr != (a**b) ** c
+
+    # Explicitly grouped exponentiation keeps its grouping
+    expr = create_sympy_expression(
+        _arithmetic(["^"], _arithmetic(["^"], ra, rb), rc)
+    )
+    assert expr == (a**b) ** c
+
+    # The other operators are left-associative
+    expr = create_sympy_expression(_arithmetic(["-", "+"], ra, rb, rc))
+    assert expr == a - b + c
+    expr = create_sympy_expression(_arithmetic(["/", "/"], ra, rb, rc))
+    assert expr == a / b / c
+
+    # Unary negation of a nested group, as in -(a - b) * c
+    expr = create_sympy_expression(
+        _arithmetic(
+            ["*"],
+            _arithmetic(["negative"], _arithmetic(["-"], ra, rb)),
+            rc,
+        )
+    )
+    assert expr == -(a - b) * c
+
+    # Nested groups, as in a * (b - c) / (c + a)
+    expr = create_sympy_expression(
+        _arithmetic(
+            ["*", "/"],
+            ra,
+            _arithmetic(["-"], rb, rc),
+            _arithmetic(["+"], rc, ra),
+        )
+    )
+    assert expr == a * (b - c) / (c + a)
+
+    # Numbers are supported, anything else is not
+    expr = create_sympy_expression(_arithmetic(["*"], 2, ra))
+    assert expr == 2 * a
+    assert create_sympy_expression(_arithmetic(["not"], ra)) is None
+    assert create_sympy_expression(_arithmetic(["%"], ra, rb)) is None
+
+
+def test_create_expression():
+    ra, rb, rc = _reference("a"), _reference("b"), _reference("c")
+
+    # Primitives and references are used as they are
+    assert create_expression(0.3) == "0.3"
+    assert create_expression(ra) == "a"
+
+    # Nested groups keep their parentheses, as in a*(b - c)/(c + a)
+    structure = _arithmetic(
+        ["*", "/"],
+        ra,
+        _arithmetic(["-"], rb, rc),
+        _arithmetic(["+"], rc, ra),
+    )
+    assert create_expression(structure) == "a*(b-c)/(c+a)"
+
+    # Unary negation keeps the sign of the group it applies to, as in
+    # -(a - b)*c
+    structure = _arithmetic(
+        ["*"],
+        _arithmetic(["negative"], _arithmetic(["-"], ra, rb)),
+        rc,
+    )
+    expression = create_expression(structure)
+    assert expression == "(-(a-b))*c"
+    a, b, c = sympy.symbols("a b c")
+    assert safe_parse_expr(expression) == -(a - b) * c
+    assert create_expression(
+        _arithmetic(["-"], ra, _arithmetic(["negative"], rb))
+    ) == "a-(-b)"
+
+    # Mixed precedence, as in a + b^c*c, where pysd nests the higher
+    # precedence operations
+    structure = _arithmetic(
+        ["+"],
+        ra,
+        _arithmetic(["*"], _arithmetic(["^"], rb, rc), rc),
+    )
+    expression = create_expression(structure)
+    assert expression == "a+((b^c)*c)"
+    assert safe_parse_expr(expression.replace("^", "**")) == a + b**c * c
+    assert create_expression(_arithmetic(["^", "^"], ra, rb, rc)) == "a^b^c"